@@ -0,0 +1,226 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+import subprocess
+from cut_points import load_cut_plan
+from media_probe import probe_video_stream
+
+# 从启动进程到主窗口首次绘制的时间预算（毫秒）
+STARTUP_BUDGET_MS = 1500
+
+def peak_rss_mb():
+    """
+    返回当前进程及其子进程的峰值内存（MB），无法获取时为None
+    """
+    try:
+        import resource
+    except ImportError:
+        # Windows上没有resource模块，尝试使用psutil
+        try:
+            import psutil
+        except ImportError:
+            return None, None
+        return psutil.Process().memory_info().peak_wset / 1024 / 1024, None
+    # macOS上ru_maxrss的单位是字节，Linux上是KB
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale,
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale)
+
+def run_pipeline_backend(video_path, plan, output_dir):
+    """
+    使用流水线后端（split_video.split_segment）切割全部片段，返回编码的帧数
+    """
+    from split_video import split_segment
+    stream_info = probe_video_stream(video_path)
+    frames = 0
+    for segment in plan.in_read_order():
+        output_path = os.path.join(output_dir, segment.output_filename)
+        frames += split_segment(video_path, segment.start, segment.duration, output_path, stream_info)
+    return frames
+
+def run_moviepy_backend(video_path, plan, output_dir):
+    """
+    使用原先基于MoviePy的方式切割全部片段，作为对比基准，返回编码的帧数
+    """
+    from moviepy.editor import VideoFileClip
+    video = VideoFileClip(video_path)
+    frames = 0
+    for segment in plan.in_read_order():
+        clip = video.subclip(segment.start, min(segment.end, video.duration))
+        clip.write_videofile(
+            os.path.join(output_dir, segment.output_filename),
+            codec="libx264",
+            audio_codec="aac",
+            temp_audiofile=os.path.join(output_dir, f"{segment.index}-temp-audio.m4a"),
+            remove_temp=True,
+            preset="medium",
+            threads=4,
+            logger=None
+        )
+        # 子片段与源共享读取器，关闭子片段会导致后续片段无法读取音频，只在最后关闭源
+        frames += int(round(clip.duration * clip.fps))
+    video.close()
+    return frames
+
+BACKENDS = {
+    'pipeline': run_pipeline_backend,
+    'moviepy': run_moviepy_backend,
+}
+
+def _run_child(backend, video_path, cut_points_path):
+    """
+    在独立进程中运行单个后端，输出JSON结果，保证峰值内存互不影响
+    """
+    plan = load_cut_plan(cut_points_path)
+    output_dir = tempfile.mkdtemp(prefix=f'bench-{backend}-')
+    try:
+        begin = time.perf_counter()
+        frames = BACKENDS[backend](video_path, plan, output_dir)
+        elapsed = time.perf_counter() - begin
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+    self_rss, child_rss = peak_rss_mb()
+    print(json.dumps({
+        'backend': backend,
+        'frames': frames,
+        'seconds': elapsed,
+        'fps': frames / elapsed if elapsed else 0,
+        'peak_rss_mb': self_rss,
+        'peak_child_rss_mb': child_rss,
+    }))
+
+def benchmark_pipeline(video_path, cut_points_path, backends=None):
+    """
+    对比流水线后端与MoviePy后端的处理速度和峰值内存
+    """
+    results = []
+    for backend in backends or list(BACKENDS):
+        print(f"正在测试后端: {backend}")
+        process = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '_child', backend, video_path, cut_points_path],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding='utf-8', errors='replace'
+        )
+        if process.returncode != 0:
+            print(f"后端 {backend} 运行失败:")
+            print(process.stderr[-2000:])
+            continue
+        results.append(json.loads(process.stdout.strip().splitlines()[-1]))
+
+    def fmt(value):
+        return f"{value:.1f}" if value is not None else "-"
+
+    print(f"\n{'后端':10s} {'帧数':>8s} {'耗时(s)':>10s} {'帧/秒':>10s} {'Python峰值内存(MB)':>20s} {'子进程峰值内存(MB)':>20s}")
+    for r in results:
+        print(f"{r['backend']:10s} {r['frames']:>8d} {r['seconds']:>10.2f} {r['fps']:>10.1f} "
+              f"{fmt(r['peak_rss_mb']):>20s} {fmt(r['peak_child_rss_mb']):>20s}")
+    return results
+
+def _run_startup_child(launch_time):
+    """
+    在独立进程中启动主窗口，输出从启动进程到首次绘制的耗时
+    """
+    from PyQt5.QtCore import QObject, QEvent, QTimer
+    from PyQt5.QtWidgets import QApplication
+    import_begin = time.time()
+    import video_splitter_gui
+
+    app = QApplication(sys.argv)
+    window_begin = time.time()
+    window = video_splitter_gui.VideoSplitterApp()
+    painted = {}
+
+    class PaintWatcher(QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Paint and not painted:
+                painted['time'] = time.time()
+                QTimer.singleShot(0, app.quit)
+            return False
+
+    watcher = PaintWatcher()
+    app.installEventFilter(watcher)
+    window.show()
+    app.exec_()
+    print(json.dumps({
+        'total_ms': (painted['time'] - float(launch_time)) * 1000,
+        'import_ms': (window_begin - import_begin) * 1000,
+        'window_ms': (painted['time'] - window_begin) * 1000,
+    }))
+
+def benchmark_startup(runs=5, populate=0, budget_ms=STARTUP_BUDGET_MS):
+    """
+    测量从启动进程到主窗口首次绘制的耗时，返回中位数是否在预算内
+
+    参数:
+        runs: 重复次数
+        populate: 在临时的默认视频目录中预先创建的文件数，用于模拟大目录
+        budget_ms: 时间预算（毫秒）
+    """
+    home = tempfile.mkdtemp(prefix='bench-startup-')
+    try:
+        video_dir = os.path.join(home, 'Videos')
+        os.makedirs(video_dir)
+        for n in range(populate):
+            open(os.path.join(video_dir, f"{n:06d}.dat"), 'wb').close()
+        env = dict(os.environ, HOME=home, USERPROFILE=home)
+        # 无图形界面的Linux环境下使用离屏渲染
+        if sys.platform.startswith('linux') and not env.get('DISPLAY'):
+            env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+        results = []
+        for _ in range(runs):
+            process = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '_startup', repr(time.time())],
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, encoding='utf-8',
+                errors='replace', env=env, cwd=os.path.dirname(os.path.abspath(__file__))
+            )
+            if process.returncode != 0:
+                print("启动失败:")
+                print(process.stderr[-2000:])
+                return False
+            results.append(json.loads(process.stdout.strip().splitlines()[-1]))
+    finally:
+        shutil.rmtree(home, ignore_errors=True)
+
+    total = statistics.median(r['total_ms'] for r in results)
+    print(f"默认视频目录文件数: {populate}，重复 {runs} 次（中位数）")
+    print(f"  导入模块: {statistics.median(r['import_ms'] for r in results):.0f} ms")
+    print(f"  创建窗口到首次绘制: {statistics.median(r['window_ms'] for r in results):.0f} ms")
+    print(f"  启动进程到首次绘制: {total:.0f} ms（预算 {budget_ms} ms）")
+    within_budget = total <= budget_ms
+    print("结果: " + ("通过" if within_budget else "超出预算"))
+    return within_budget
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == '_child':
+        _run_child(*argv[1:4])
+        return
+    if argv and argv[0] == '_startup':
+        _run_startup_child(argv[1])
+        return
+
+    parser = argparse.ArgumentParser(description='Echo智剪性能基准测试')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    pipeline_parser = subparsers.add_parser('pipeline', help='对比流水线后端与MoviePy后端的速度和峰值内存')
+    pipeline_parser.add_argument('video', help='源视频文件')
+    pipeline_parser.add_argument('cut_points', help='切割点文件')
+    pipeline_parser.add_argument('--backend', action='append', choices=list(BACKENDS),
+                                 help='只测试指定后端，可重复')
+    startup_parser = subparsers.add_parser('startup', help='测量主窗口首次绘制的耗时')
+    startup_parser.add_argument('--runs', type=int, default=5, help='重复次数')
+    startup_parser.add_argument('--populate', type=int, default=0, help='在默认视频目录中预先创建的文件数')
+    startup_parser.add_argument('--budget', type=int, default=STARTUP_BUDGET_MS, help='时间预算（毫秒）')
+    args = parser.parse_args(argv)
+
+    if args.command == 'pipeline':
+        benchmark_pipeline(args.video, args.cut_points, args.backend)
+    elif args.command == 'startup':
+        return 0 if benchmark_startup(args.runs, args.populate, args.budget) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,236 @@
+import os
+import re
+import sys
+import json
+import math
+import hashlib
+import argparse
+import subprocess
+from encode_profiles import APP_DATA_DIR
+from cut_points import format_cut_line
+from http_source import is_url, resolve_source, source_signature
+
+# 分析参数默认值
+ANALYSIS_DEFAULTS = {
+    'silence_db': -35,          # 低于该音量视为静音（dB）
+    'silence_min': 0.8,         # 最短静音时长（秒）
+    'scene_threshold': 0.4,     # 场景变化分数阈值（0~1）
+    'keyframes_only': True,     # 只解码关键帧，编码器通常会在场景切换处插入关键帧
+    'analysis_width': 160,      # 场景评分使用的画面宽度
+    'audio_rate': 8000,         # 静音检测使用的采样率
+}
+
+# 分析结果缓存文件名后缀，与源视频放在同一目录
+CACHE_SUFFIX = '.analysis.json'
+CACHE_VERSION = 1
+
+SILENCE_START_RE = re.compile(r'silence_start:\s*(-?[\d\.]+)')
+SILENCE_END_RE = re.compile(r'silence_end:\s*(-?[\d\.]+)')
+SCENE_RE = re.compile(r'Parsed_showinfo.*?pts_time:\s*([\d\.]+)')
+DURATION_RE = re.compile(r'Duration:\s*(\d+):(\d+):([\d\.]+)')
+
+def build_analysis_command(video_path, params):
+    """
+    构建单次解码同时完成静音检测和场景评分的FFmpeg命令
+    """
+    cmd = ['ffmpeg', '-hide_banner', '-nostats']
+    if params['keyframes_only']:
+        cmd.extend(['-skip_frame', 'nokey'])
+    cmd.extend([
+        '-i', video_path,
+        # 缩小画面后再计算场景分数，只把超过阈值的帧交给showinfo打印时间
+        '-vf', f"scale={params['analysis_width']}:-2,select='gt(scene,{params['scene_threshold']})',showinfo",
+        # 降低采样率并混为单声道后做静音检测
+        '-af', f"aformat=sample_rates={params['audio_rate']}:channel_layouts=mono,"
+               f"silencedetect=noise={params['silence_db']}dB:d={params['silence_min']}",
+        '-f', 'null', '-',
+    ])
+    return cmd
+
+def parse_analysis_output(stderr):
+    """
+    从FFmpeg日志中解析源视频时长、静音区间和场景变化时间点
+    """
+    duration = None
+    silences = []
+    scenes = []
+    silence_start = None
+    for line in stderr.splitlines():
+        if duration is None:
+            match = DURATION_RE.search(line)
+            if match:
+                duration = int(match.group(1)) * 3600 + int(match.group(2)) * 60 + float(match.group(3))
+                continue
+        match = SILENCE_START_RE.search(line)
+        if match:
+            silence_start = max(float(match.group(1)), 0.0)
+            continue
+        match = SILENCE_END_RE.search(line)
+        if match and silence_start is not None:
+            silences.append((silence_start, float(match.group(1))))
+            silence_start = None
+            continue
+        match = SCENE_RE.search(line)
+        if match:
+            scenes.append(float(match.group(1)))
+    # 静音持续到文件末尾时没有silence_end
+    if silence_start is not None and duration is not None:
+        silences.append((silence_start, duration))
+    return duration, silences, scenes
+
+def _cache_paths(video_path):
+    """
+    返回可能的缓存文件路径：优先与源视频放在一起，源目录不可写或源视频为远程地址时放到应用数据目录
+    """
+    if is_url(video_path):
+        digest = hashlib.sha1(video_path.encode('utf-8')).hexdigest()
+        return [os.path.join(APP_DATA_DIR, 'analysis', digest + CACHE_SUFFIX)]
+    sidecar = video_path + CACHE_SUFFIX
+    digest = hashlib.sha1(os.path.abspath(video_path).encode('utf-8')).hexdigest()
+    fallback = os.path.join(APP_DATA_DIR, 'analysis', digest + CACHE_SUFFIX)
+    return [sidecar, fallback]
+
+def _cache_key(video_path, params):
+    key = {'version': CACHE_VERSION, 'params': params}
+    key.update(source_signature(video_path))
+    return key
+
+def load_cached_analysis(video_path, params):
+    """
+    读取与当前源文件和分析参数匹配的缓存结果，没有时返回None
+    """
+    key = _cache_key(video_path, params)
+    for path in _cache_paths(video_path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if data.get('key') == key:
+            return data['result']
+    return None
+
+def save_cached_analysis(video_path, params, result):
+    key = _cache_key(video_path, params)
+    for path in _cache_paths(video_path):
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({'key': key, 'result': result}, f, ensure_ascii=False)
+            return path
+        except OSError:
+            continue
+    return None
+
+def analyze_video(video_path, use_cache=True, log=print, **overrides):
+    """
+    解码一次源视频，同时完成静音检测和场景变化评分
+
+    返回包含 duration、silences、scenes 的字典，结果会缓存在源视频旁边
+    """
+    params = dict(ANALYSIS_DEFAULTS)
+    params.update(overrides)
+
+    if use_cache:
+        cached = load_cached_analysis(video_path, params)
+        if cached is not None:
+            log("使用已缓存的分析结果")
+            return cached
+
+    log(f"正在分析视频: {video_path}")
+    process = subprocess.run(build_analysis_command(resolve_source(video_path), params),
+                             stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                             text=True, encoding='utf-8', errors='replace')
+    if process.returncode != 0:
+        raise RuntimeError(f"分析视频时出错:\n{process.stderr[-2000:]}")
+
+    duration, silences, scenes = parse_analysis_output(process.stderr)
+    if duration is None:
+        raise RuntimeError("无法获取视频时长")
+    result = {'duration': duration, 'silences': silences, 'scenes': scenes}
+    log(f"检测到 {len(silences)} 段静音，{len(scenes)} 个场景变化")
+
+    if use_cache:
+        save_cached_analysis(video_path, params, result)
+    return result
+
+def suggest_cut_points(analysis, min_length=60, max_length=900, snap_window=2.0):
+    """
+    根据分析结果生成切割点（秒）
+
+    优先在静音处切割：静音区间内或附近有场景变化时对齐到场景变化，否则取静音中点；
+    两个静音之间超过max_length时退而在场景变化处切割，仍然没有时把这一段均分为不超过max_length的几段
+
+    参数:
+        analysis: analyze_video 的返回值
+        min_length: 片段最短时长（秒）
+        max_length: 片段最长时长（秒）
+        snap_window: 静音区间向两侧扩展、用于对齐场景变化的范围（秒）
+    """
+    duration = analysis['duration']
+    scenes = sorted(analysis['scenes'])
+
+    candidates = []
+    for start, end in analysis['silences']:
+        near = [t for t in scenes if start - snap_window <= t <= end + snap_window]
+        if near:
+            middle = (start + end) / 2
+            candidates.append(min(near, key=lambda t: abs(t - middle)))
+        else:
+            candidates.append((start + end) / 2)
+    candidates.sort()
+
+    cuts = []
+    last = 0.0
+    for t in candidates + [duration]:
+        # 距上一个切割点太远时，先用场景变化或强制切割补齐；补齐后到t的剩余部分也不能短于min_length
+        while t - last > max_length:
+            upper = min(last + max_length, t - min_length)
+            fallback = [s for s in scenes if last + min_length <= s <= upper]
+            if fallback:
+                last = fallback[-1]
+            else:
+                # 没有场景变化时把剩余部分均分，避免最后留下很短的一段
+                last += (t - last) / math.ceil((t - last) / max_length)
+            cuts.append(last)
+        if t - last >= min_length and duration - t >= min_length:
+            cuts.append(t)
+            last = t
+    return [c for c in cuts if 0 < c < duration]
+
+def write_cut_points(cut_times, duration, output_path, name_format='片段{n}'):
+    """
+    按 N、start~end，name 格式写出切割点文件
+    """
+    bounds = [0.0] + list(cut_times) + [duration]
+    lines = []
+    for n, (start, end) in enumerate(zip(bounds, bounds[1:]), 1):
+        lines.append(format_cut_line(n, start, end, name_format.format(n=n)))
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+    return len(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='分析视频中的静音和场景变化，自动生成切割点文件')
+    parser.add_argument('video', help='源视频文件或HTTP(S)地址')
+    parser.add_argument('output', nargs='?', help='输出的切割点文件，默认为源视频目录下的 视频切割点_自动.txt')
+    parser.add_argument('--min-length', type=float, default=60, help='片段最短时长（秒）')
+    parser.add_argument('--max-length', type=float, default=900, help='片段最长时长（秒）')
+    parser.add_argument('--silence-db', type=float, default=ANALYSIS_DEFAULTS['silence_db'], help='静音阈值（dB）')
+    parser.add_argument('--silence-min', type=float, default=ANALYSIS_DEFAULTS['silence_min'], help='最短静音时长（秒）')
+    parser.add_argument('--scene-threshold', type=float, default=ANALYSIS_DEFAULTS['scene_threshold'], help='场景变化阈值（0~1）')
+    parser.add_argument('--all-frames', action='store_true', help='解码所有帧而不仅是关键帧（更准确但更慢）')
+    parser.add_argument('--no-cache', action='store_true', help='忽略已缓存的分析结果')
+    args = parser.parse_args(argv)
+
+    video_dir = os.getcwd() if is_url(args.video) else os.path.dirname(os.path.abspath(args.video))
+    output_path = args.output or os.path.join(video_dir, '视频切割点_自动.txt')
+    analysis = analyze_video(args.video, use_cache=not args.no_cache,
+                             silence_db=args.silence_db, silence_min=args.silence_min,
+                             scene_threshold=args.scene_threshold, keyframes_only=not args.all_frames)
+    cuts = suggest_cut_points(analysis, args.min_length, args.max_length)
+    count = write_cut_points(cuts, analysis['duration'], output_path)
+    print(f"已生成 {count} 个切割点: {output_path}")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,186 @@
+import re
+
+# 切割点格式: 序号、开始时间~结束时间，视频名称
+# 例如: 1、00:00:00,033~00:10:13,500，线程间通讯基础及Emitter引入
+# 序号可以省略，以兼容早期版本的 开始时间~结束时间，视频名称 格式
+CUT_POINT_RE = re.compile(r'(?:\d+、)?([\d:,\.]+)~([\d:,\.]+)，(.+)')
+
+def time_to_seconds(time_str):
+    """
+    将时间字符串转换为秒数
+    支持格式：HH:MM:SS,mmm 或 HH:MM:SS.mmm 或 MM:SS 或 SS
+    格式无效时抛出ValueError
+    """
+    # 替换逗号为点，以便统一处理
+    parts = time_str.replace(',', '.').split(':')
+    if len(parts) > 3 or not all(parts):
+        raise ValueError(f"无效的时间格式: {time_str}")
+    seconds = float(parts[-1])
+    minutes = int(parts[-2]) if len(parts) >= 2 else 0
+    hours = int(parts[-3]) if len(parts) == 3 else 0
+    if len(parts) >= 2 and seconds >= 60 or len(parts) == 3 and minutes >= 60:
+        raise ValueError(f"无效的时间格式: {time_str}")
+    return hours * 3600 + minutes * 60 + seconds
+
+def format_time(seconds):
+    """
+    将秒数转换为 HH:MM:SS.mmm 格式，适用于FFmpeg
+    """
+    hours = int(seconds // 3600)
+    minutes = int((seconds % 3600) // 60)
+    seconds = seconds % 60
+    return f"{hours:02d}:{minutes:02d}:{seconds:06.3f}"
+
+def format_srt_time(seconds):
+    """
+    将秒数转换为切割点文件使用的 HH:MM:SS,mmm 格式
+    """
+    millis = int(round(seconds * 1000))
+    hours, millis = divmod(millis, 3600000)
+    minutes, millis = divmod(millis, 60000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
+
+def format_cut_line(n, start, end, name):
+    """
+    生成一行 N、start~end，name 格式的切割点
+    """
+    return f"{n}、{format_srt_time(start)}~{format_srt_time(end)}，{name}"
+
+class Segment:
+    """
+    切割计划中的一个片段
+
+    index 为切割点在文件中的行号（从1开始），用作输出文件名的序号前缀
+    """
+    __slots__ = ('index', 'start', 'end', 'name', 'start_str', 'end_str')
+
+    def __init__(self, index, start, end, name, start_str, end_str):
+        self.index = index
+        self.start = start
+        self.end = end
+        self.name = name
+        self.start_str = start_str
+        self.end_str = end_str
+
+    @property
+    def duration(self):
+        return self.end - self.start
+
+    @property
+    def output_filename(self):
+        return f"{self.index}-{self.name}.mp4"
+
+    def __repr__(self):
+        return f"Segment({self.index}, {self.start:.3f}~{self.end:.3f}, {self.name!r})"
+
+class CutPlan:
+    """
+    解析并校验后的切割计划
+
+    segments 按文件中的顺序排列；errors 中的问题会导致无法开始处理，
+    warnings 中的问题（截断、重叠、重复）只需提示
+    """
+
+    def __init__(self, segments, errors, warnings, source_duration=None):
+        self.segments = segments
+        self.errors = errors
+        self.warnings = warnings
+        self.source_duration = source_duration
+
+    def __len__(self):
+        return len(self.segments)
+
+    def __iter__(self):
+        return iter(self.segments)
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    @property
+    def total_duration(self):
+        return sum(segment.duration for segment in self.segments)
+
+    def in_read_order(self):
+        """
+        按开始时间排序的片段，使对源文件的读取顺序与其在文件中的位置一致
+        """
+        return sorted(self.segments, key=lambda segment: (segment.start, segment.end))
+
+def parse_cut_points(lines, source_duration=None):
+    """
+    一次性解析并校验全部切割点
+
+    参数:
+        lines: 切割点文件的各行
+        source_duration: 源视频时长（秒），提供时会截断超出结尾的片段并报告起点超出结尾的片段
+    """
+    segments = []
+    errors = []
+    warnings = []
+
+    for i, line in enumerate(lines):
+        line = line.strip()
+        if not line:
+            continue
+        line_no = i + 1
+
+        match = CUT_POINT_RE.fullmatch(line)
+        if not match:
+            errors.append(f"第{line_no}行: 无法解析切割点格式: {line}")
+            continue
+        start_str, end_str, name = match.groups()
+        try:
+            start = time_to_seconds(start_str)
+            end = time_to_seconds(end_str)
+        except ValueError as e:
+            errors.append(f"第{line_no}行: {e}")
+            continue
+
+        if end <= start:
+            errors.append(f"第{line_no}行: 结束时间 {end_str} 不晚于开始时间 {start_str}")
+            continue
+        if source_duration is not None:
+            if start >= source_duration:
+                errors.append(f"第{line_no}行: 开始时间 {start_str} 超出视频时长 {format_srt_time(source_duration)}")
+                continue
+            if end > source_duration:
+                warnings.append(f"第{line_no}行: 结束时间 {end_str} 超出视频时长，已截断到 {format_srt_time(source_duration)}")
+                end = source_duration
+
+        segments.append(Segment(line_no, start, end, name.strip(), start_str, end_str))
+
+    # 按开始时间扫描一遍即可找出重复和重叠
+    latest = None
+    seen = {}
+    for segment in sorted(segments, key=lambda s: (s.start, s.end)):
+        key = (segment.start, segment.end)
+        if key in seen:
+            warnings.append(f"第{segment.index}行: 与第{seen[key].index}行的时间段重复")
+        else:
+            seen[key] = segment
+            if latest is not None and segment.start < latest.end:
+                warnings.append(f"第{segment.index}行: 与第{latest.index}行的时间段重叠")
+        if latest is None or segment.end > latest.end:
+            latest = segment
+
+    return CutPlan(segments, errors, warnings, source_duration)
+
+def read_cut_points_file(cut_points_path):
+    """
+    读取切割点文件的各行，UTF-8（可带BOM）解码失败时尝试GBK
+    """
+    try:
+        with open(cut_points_path, 'r', encoding='utf-8-sig') as f:
+            return f.readlines()
+    except UnicodeDecodeError:
+        # 尝试使用其他编码
+        with open(cut_points_path, 'r', encoding='gbk') as f:
+            return f.readlines()
+
+def load_cut_plan(cut_points_path, source_duration=None):
+    """
+    读取并解析切割点文件
+    """
+    return parse_cut_points(read_cut_points_file(cut_points_path), source_duration)
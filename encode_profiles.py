@@ -0,0 +1,233 @@
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import subprocess
+from media_probe import probe_duration
+
+# 应用数据目录，用于保存校准结果等本机相关的缓存
+APP_DATA_DIR = os.path.join(os.path.expanduser('~'), '.echo_split')
+CALIBRATION_FILE = os.path.join(APP_DATA_DIR, 'encoder_calibration.json')
+
+# 默认编码配置，与之前版本的输出保持一致
+DEFAULT_PROFILE = 'standard'
+
+# 编码配置
+# crf 与 video_bitrate 二选一；threads 为 0 时由 FFmpeg 自动决定线程数；
+# scale 为输出高度（像素），None 表示保持原始分辨率
+ENCODE_PROFILES = {
+    'standard': {
+        'label': '标准',
+        'video_codec': 'libx264',
+        'preset': 'medium',
+        'crf': 23,
+        'video_bitrate': None,
+        'tune': None,
+        'threads': 0,
+        'scale': None,
+        'audio_codec': 'aac',
+        'audio_bitrate': '192k',
+    },
+    'archive': {
+        'label': '归档（高质量）',
+        'video_codec': 'libx264',
+        'preset': 'slow',
+        'crf': 18,
+        'video_bitrate': None,
+        'tune': None,
+        'threads': 0,
+        'scale': None,
+        'audio_codec': 'aac',
+        'audio_bitrate': '256k',
+    },
+    'fast': {
+        'label': '快速出片',
+        'video_codec': 'libx264',
+        'preset': 'veryfast',
+        'crf': 23,
+        'video_bitrate': None,
+        'tune': None,
+        'threads': 0,
+        'scale': None,
+        'audio_codec': 'aac',
+        'audio_bitrate': '160k',
+    },
+    'proxy': {
+        'label': '代理预览（低分辨率）',
+        'video_codec': 'libx264',
+        'preset': 'ultrafast',
+        'crf': None,
+        'video_bitrate': '600k',
+        'tune': 'fastdecode',
+        'threads': 0,
+        'scale': 360,
+        'audio_codec': 'aac',
+        'audio_bitrate': '64k',
+    },
+}
+
+def get_profile(name):
+    """
+    根据名称获取编码配置，名称无效时抛出ValueError
+    """
+    if name not in ENCODE_PROFILES:
+        raise ValueError(f"未知的编码配置: {name}，可选: {', '.join(ENCODE_PROFILES)}")
+    return ENCODE_PROFILES[name]
+
+def build_encode_args(name):
+    """
+    生成编码配置对应的FFmpeg输出参数（不含滤镜）
+    """
+    profile = get_profile(name)
+    args = ['-c:v', profile['video_codec'], '-preset', profile['preset']]
+    if profile['video_bitrate']:
+        args.extend(['-b:v', profile['video_bitrate']])
+    else:
+        args.extend(['-crf', str(profile['crf'])])
+    if profile['tune']:
+        args.extend(['-tune', profile['tune']])
+    if profile['threads']:
+        args.extend(['-threads', str(profile['threads'])])
+    args.extend(['-c:a', profile['audio_codec'], '-b:a', profile['audio_bitrate']])
+    return args
+
+def video_filter(name):
+    """
+    返回编码配置需要的视频滤镜，无需滤镜时返回None
+    """
+    scale = get_profile(name)['scale']
+    if scale:
+        # -2 保证宽度为偶数，满足libx264的要求
+        return f"scale=-2:{scale}"
+    return None
+
+def load_calibration():
+    """
+    读取本机的校准结果，不存在或已损坏时返回空字典
+    """
+    try:
+        with open(CALIBRATION_FILE, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    # 校准结果只对测得它的机器有效
+    if data.get('machine') != platform.node():
+        return {}
+    return data.get('profiles', {})
+
+def estimate_encode_seconds(name, media_seconds, calibration=None):
+    """
+    根据校准的编码速度估算处理指定时长的素材需要的秒数，没有校准数据时返回None
+    """
+    if calibration is None:
+        calibration = load_calibration()
+    result = calibration.get(name)
+    if not result or result.get('speed', 0) <= 0:
+        return None
+    return media_seconds / result['speed']
+
+def estimate_encoded_bytes(name, media_seconds, calibration=None):
+    """
+    根据校准的码率估算输出文件大小（字节），没有校准数据时返回None
+    """
+    if calibration is None:
+        calibration = load_calibration()
+    result = calibration.get(name)
+    if not result:
+        return None
+    return int(media_seconds * result['bytes_per_second'])
+
+def calibrate_profiles(video_path, sample_seconds=20, start_seconds=0, profiles=None, log=print):
+    """
+    在本机上用每个编码配置试编码一小段视频，记录编码速度和输出大小
+
+    参数:
+        video_path: 用于试编码的视频路径
+        sample_seconds: 试编码的时长（秒）
+        start_seconds: 试编码的起始位置（秒）
+        profiles: 需要校准的配置名称列表，默认为全部配置
+        log: 日志输出函数
+    """
+    if profiles is None:
+        profiles = list(ENCODE_PROFILES)
+
+    results = {}
+    for name in profiles:
+        fd, trial_path = tempfile.mkstemp(prefix=f'calibrate-{name}-', suffix='.mp4')
+        os.close(fd)
+        cmd = ['ffmpeg', '-ss', str(start_seconds), '-t', str(sample_seconds), '-i', video_path]
+        vf = video_filter(name)
+        if vf:
+            cmd.extend(['-vf', vf])
+        cmd.extend(build_encode_args(name))
+        cmd.extend(['-y', trial_path])
+
+        log(f"正在校准编码配置: {name}")
+        try:
+            begin = time.perf_counter()
+            process = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                     text=True, encoding='utf-8', errors='replace')
+            elapsed = time.perf_counter() - begin
+            if process.returncode != 0:
+                log(f"校准 {name} 时出错:")
+                log(process.stderr)
+                continue
+            size = os.path.getsize(trial_path)
+            # 源视频短于试编码时长时实际编码的内容更少，按输出的实际时长计算速度和码率
+            encoded_seconds = probe_duration(trial_path)
+            if not encoded_seconds:
+                log(f"校准 {name} 时出错: 无法读取试编码输出的时长")
+                continue
+        finally:
+            if os.path.exists(trial_path):
+                os.remove(trial_path)
+
+        results[name] = {
+            'speed': encoded_seconds / elapsed,  # 相对实时的倍速
+            'bytes_per_second': size / encoded_seconds,
+        }
+        log(f"  速度: {results[name]['speed']:.2f}x  码率: {results[name]['bytes_per_second'] * 8 / 1000:.0f} kbps")
+
+    # 与已有结果合并后保存
+    calibration = load_calibration()
+    calibration.update(results)
+    os.makedirs(APP_DATA_DIR, exist_ok=True)
+    with open(CALIBRATION_FILE, 'w', encoding='utf-8') as f:
+        json.dump({
+            'machine': platform.node(),
+            'cpu': platform.processor() or platform.machine(),
+            'cpu_count': os.cpu_count(),
+            'updated': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'profiles': calibration,
+        }, f, ensure_ascii=False, indent=2)
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Echo智剪编码配置工具')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('list', help='列出编码配置及本机校准结果')
+    calibrate_parser = subparsers.add_parser('calibrate', help='在本机上试编码并记录速度和大小')
+    calibrate_parser.add_argument('video', help='用于试编码的视频文件')
+    calibrate_parser.add_argument('--seconds', type=float, default=20, help='试编码时长（秒）')
+    calibrate_parser.add_argument('--start', type=float, default=0, help='试编码起始位置（秒）')
+    calibrate_parser.add_argument('--profile', action='append', choices=list(ENCODE_PROFILES),
+                                  help='只校准指定配置，可重复')
+    args = parser.parse_args(argv)
+
+    if args.command == 'calibrate':
+        calibrate_profiles(args.video, args.seconds, args.start, args.profile)
+        print(f"校准结果已保存到: {CALIBRATION_FILE}")
+        return
+
+    calibration = load_calibration()
+    for name, profile in ENCODE_PROFILES.items():
+        line = f"{name:10s} {profile['label']}  {' '.join(build_encode_args(name))}"
+        if name in calibration:
+            line += f"  [本机速度 {calibration[name]['speed']:.2f}x]"
+        print(line)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+import os
+import re
+import json
+import shutil
+import subprocess
+from encode_profiles import APP_DATA_DIR
+
+# FFmpeg能力缓存，按可执行文件路径保存，路径、修改时间或大小变化时重新探测
+CAPS_CACHE_FILE = os.path.join(APP_DATA_DIR, 'ffmpeg_capabilities.json')
+
+ENCODER_RE = re.compile(r'^\s*[VAS][\.A-Z]{5}\s+(\w\S*)')
+FILTER_RE = re.compile(r'^\s*[\.A-Z]{2,3}\s+(\S+)\s+\S*->\S*')
+
+# 进程内缓存，避免重复读取缓存文件
+_memory_cache = {}
+
+def _run(ffmpeg_path, *args):
+    process = subprocess.run([ffmpeg_path, '-hide_banner', *args],
+                             stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                             text=True, encoding='utf-8', errors='replace', check=True)
+    return process.stdout
+
+def probe_capabilities(ffmpeg_path):
+    """
+    运行FFmpeg读取版本号、可用编码器和滤镜
+    """
+    version = _run(ffmpeg_path, '-version').splitlines()[0]
+    encoders = [m.group(1) for m in map(ENCODER_RE.match, _run(ffmpeg_path, '-encoders').splitlines()) if m]
+    filters = [m.group(1) for m in map(FILTER_RE.match, _run(ffmpeg_path, '-filters').splitlines()) if m]
+    return {
+        'version': version,
+        'encoders': encoders,
+        'filters': filters,
+    }
+
+def _load_cache():
+    try:
+        with open(CAPS_CACHE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_cache(cache):
+    try:
+        os.makedirs(APP_DATA_DIR, exist_ok=True)
+        with open(CAPS_CACHE_FILE, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, ensure_ascii=False, indent=2)
+    except OSError:
+        # 缓存写入失败不影响使用
+        pass
+
+def get_ffmpeg_capabilities(ffmpeg='ffmpeg'):
+    """
+    获取FFmpeg的能力信息，未安装FFmpeg时返回None
+
+    返回包含 path、version、encoders、filters 的字典；结果按可执行文件路径和修改时间缓存，
+    FFmpeg未更换时无需再启动FFmpeg进程
+    """
+    ffmpeg_path = shutil.which(ffmpeg)
+    if ffmpeg_path is None:
+        return None
+    ffmpeg_path = os.path.realpath(ffmpeg_path)
+    try:
+        stat = os.stat(ffmpeg_path)
+    except OSError:
+        return None
+    key = {'mtime': stat.st_mtime, 'size': stat.st_size}
+
+    cached = _memory_cache.get(ffmpeg_path)
+    if cached and cached['key'] == key:
+        return cached['caps']
+
+    cache = _load_cache()
+    entry = cache.get(ffmpeg_path)
+    if not entry or entry.get('key') != key:
+        try:
+            caps = probe_capabilities(ffmpeg_path)
+        except (subprocess.SubprocessError, OSError, IndexError):
+            return None
+        caps['path'] = ffmpeg_path
+        entry = {'key': key, 'caps': caps}
+        cache[ffmpeg_path] = entry
+        _save_cache(cache)
+
+    _memory_cache[ffmpeg_path] = entry
+    return entry['caps']
+
+def has_encoder(caps, name):
+    return caps is not None and name in caps['encoders']
+
+def has_filter(caps, name):
+    return caps is not None and name in caps['filters']
@@ -0,0 +1,507 @@
+import os
+import re
+import ssl
+import socket
+import sys
+import json
+import shutil
+import hashlib
+import argparse
+import threading
+import contextlib
+import http.client
+from urllib.parse import urlsplit, quote
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler, SimpleHTTPRequestHandler
+from encode_profiles import APP_DATA_DIR
+
+# 远程源视频按块缓存在本地，多个片段任务共享；缓存按URL、大小和ETag/Last-Modified校验
+HTTP_CACHE_DIR = os.path.join(APP_DATA_DIR, 'http_cache')
+BLOCK_SIZE = 1024 * 1024
+
+# 同一请求中连续读取时，每次向上游多请求的块数按1、2、4…递增到该上限；
+# 跳转后的第一次读取只取一块，FFmpeg读取文件头和索引时不会多下载
+READ_AHEAD_BLOCKS = 4
+
+# 代理连接的发送缓冲区：FFmpeg跳转前不会读完整个响应，缓冲区越小，提前读取而未被用到的数据越少
+PROXY_SEND_BUFFER = 256 * 1024
+
+# 缓存总大小上限，超出时按最近使用时间删除其他源文件的缓存
+CACHE_MAX_BYTES = 50 * 1024 ** 3
+
+UPSTREAM_TIMEOUT = 30
+MAX_IDLE_CONNECTIONS = 4
+
+CONTENT_RANGE_RE = re.compile(r'bytes (\d+)-(\d+)/(\d+)')
+RANGE_RE = re.compile(r'bytes=(\d*)-(\d*)$')
+
+def is_url(path):
+    """
+    判断源视频是否为HTTP(S)地址
+    """
+    return path.lower().startswith(('http://', 'https://'))
+
+class _ConnectionPool:
+    """
+    上游连接池：按主机保留空闲的长连接，并发的片段任务之间复用
+    """
+
+    def __init__(self):
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def _new_connection(self, scheme, netloc):
+        if scheme == 'https':
+            return http.client.HTTPSConnection(netloc, timeout=UPSTREAM_TIMEOUT,
+                                               context=ssl.create_default_context())
+        return http.client.HTTPConnection(netloc, timeout=UPSTREAM_TIMEOUT)
+
+    @contextlib.contextmanager
+    def connection(self, scheme, netloc):
+        """
+        取出一个连接；正常结束时放回连接池（调用方须已读完响应），出错时关闭
+        """
+        key = (scheme, netloc)
+        with self._lock:
+            idle = self._idle.get(key)
+            conn = idle.pop() if idle else None
+        if conn is None:
+            conn = self._new_connection(scheme, netloc)
+        try:
+            yield conn
+        except BaseException:
+            conn.close()
+            raise
+        if conn.sock is None:
+            # 调用方已关闭连接（响应未读完）或服务器要求关闭，不再放回连接池
+            return
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < MAX_IDLE_CONNECTIONS:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def request(self, url, headers, max_bytes):
+        """
+        发送范围请求，返回 (状态码, 响应头, 内容)；连接失效时换新连接重试一次
+
+        只有状态码为206且长度不超过max_bytes时才读取内容，否则内容为None并直接关闭连接，
+        服务器忽略Range而返回整个文件时不会把它读进内存
+        """
+        parts = urlsplit(url)
+        target = parts.path or '/'
+        if parts.query:
+            target += '?' + parts.query
+        for attempt in range(2):
+            try:
+                with self.connection(parts.scheme, parts.netloc) as conn:
+                    conn.request('GET', target, headers=headers)
+                    response = conn.getresponse()
+                    length = response.getheader('Content-Length')
+                    if response.status != 206 or not length or not length.isdigit() or int(length) > max_bytes:
+                        conn.close()
+                        return response.status, response.headers, None
+                    return response.status, response.headers, response.read()
+            except (http.client.HTTPException, OSError) as e:
+                # 服务器可能已关闭空闲的长连接
+                if attempt:
+                    raise IOError(f"请求 {url} 失败: {e}") from e
+        return None
+
+class RemoteSource:
+    """
+    一个远程源文件：按块从上游读取并缓存在本地磁盘
+    """
+
+    def __init__(self, url, pool):
+        self.url = url
+        self.pool = pool
+        self.cache_dir = os.path.join(HTTP_CACHE_DIR, hashlib.sha1(url.encode('utf-8')).hexdigest())
+        self.fetched_bytes = 0
+        self.served_bytes = 0
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._open()
+
+    def _open(self):
+        # 只请求第一个字节：既能得到文件大小，也能确认服务器支持范围请求
+        status, headers, _ = self.pool.request(self.url, {'Range': 'bytes=0-0'}, 1)
+        if status >= 400:
+            raise IOError(f"无法访问（HTTP {status}）: {self.url}")
+        match = CONTENT_RANGE_RE.match(headers.get('Content-Range', ''))
+        if status != 206 or not match:
+            raise IOError(f"服务器不支持范围请求（HTTP {status}）: {self.url}")
+        self.size = int(match.group(3))
+        self.etag = headers.get('ETag')
+        self.last_modified = headers.get('Last-Modified')
+
+        meta = {'url': self.url, 'size': self.size, 'etag': self.etag, 'last_modified': self.last_modified}
+        meta_path = os.path.join(self.cache_dir, 'meta.json')
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                cached_meta = json.load(f)
+        except (OSError, ValueError):
+            cached_meta = None
+        if cached_meta != meta:
+            # 远程文件已变化，丢弃旧的缓存块
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(meta_path, 'w', encoding='utf-8') as f:
+                json.dump(meta, f, ensure_ascii=False)
+        else:
+            # 更新修改时间，清理缓存时按最近使用排序
+            os.utime(meta_path)
+        self._present = {int(name) for name in os.listdir(self.cache_dir) if name.isdigit()}
+
+    def signature(self):
+        """
+        用于缓存校验的远程文件标识
+        """
+        return {'size': self.size, 'etag': self.etag, 'last_modified': self.last_modified}
+
+    def stats(self):
+        """
+        返回 (从上游下载的字节数, 提供给FFmpeg的字节数, 文件大小)
+        """
+        with self._lock:
+            return self.fetched_bytes, self.served_bytes, self.size
+
+    def _block_path(self, index):
+        return os.path.join(self.cache_dir, f"{index:08d}")
+
+    def _fetch(self, first, last):
+        """
+        用一次范围请求从上游读取连续的若干块并写入缓存
+        """
+        start = first * BLOCK_SIZE
+        end = min((last + 1) * BLOCK_SIZE, self.size) - 1
+        status, headers, body = self.pool.request(self.url, {'Range': f"bytes={start}-{end}"}, end - start + 1)
+        match = CONTENT_RANGE_RE.match(headers.get('Content-Range', ''))
+        if body is None or not match or int(match.group(1)) != start or int(match.group(3)) != self.size:
+            raise IOError(f"范围请求返回了意外的结果（HTTP {status}）: {self.url}")
+        if len(body) != end - start + 1:
+            raise IOError(f"范围请求返回的数据不完整: {self.url}")
+        with self._lock:
+            self.fetched_bytes += len(body)
+        for index in range(first, last + 1):
+            offset = (index - first) * BLOCK_SIZE
+            temp_path = self._block_path(index) + '.tmp'
+            with open(temp_path, 'wb') as f:
+                f.write(body[offset:offset + BLOCK_SIZE])
+            os.replace(temp_path, self._block_path(index))
+            self._present.add(index)
+
+    def _ensure(self, index, last_index, read_ahead=1):
+        """
+        确保第index块已在缓存中；缺失时连同其后最多read_ahead-1个缺失块一起读取，其他线程正在读取时等待
+        """
+        while index not in self._present:
+            run = []
+            with self._lock:
+                if index in self._present:
+                    break
+                event = self._inflight.get(index)
+                if event is None:
+                    n = index
+                    while (n <= min(last_index, index + read_ahead - 1)
+                           and n not in self._present and n not in self._inflight):
+                        run.append(n)
+                        n += 1
+                    event = threading.Event()
+                    for n in run:
+                        self._inflight[n] = event
+            if not run:
+                # 其他线程正在读取该块；读取失败时块仍缺失，由本线程重试
+                event.wait()
+                continue
+            try:
+                self._fetch(run[0], run[-1])
+            finally:
+                with self._lock:
+                    for n in run:
+                        self._inflight.pop(n, None)
+                event.set()
+
+    def iter_range(self, start, end):
+        """
+        按块依次返回 [start, end] 范围内的数据
+        """
+        first = start // BLOCK_SIZE
+        last = end // BLOCK_SIZE
+        for count, index in enumerate(range(first, last + 1)):
+            self._ensure(index, last, min(1 << count, READ_AHEAD_BLOCKS))
+            block_start = index * BLOCK_SIZE
+            with open(self._block_path(index), 'rb') as f:
+                f.seek(max(start - block_start, 0))
+                data = f.read(min(end + 1, block_start + BLOCK_SIZE) - max(start, block_start))
+            with self._lock:
+                self.served_bytes += len(data)
+            yield data
+
+class _ProxyHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        self.request.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, PROXY_SEND_BUFFER)
+        super().setup()
+
+    def log_message(self, format, *args):
+        # FFmpeg会发出大量范围请求，不输出访问日志
+        pass
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def _serve(self, send_body):
+        token = self.path.lstrip('/').split('/', 1)[0]
+        source = self.server.sources.get(token)
+        if source is None:
+            self.send_error(404)
+            return
+
+        start, end = 0, source.size - 1
+        status = 200
+        range_header = self.headers.get('Range')
+        if range_header:
+            match = RANGE_RE.match(range_header.strip())
+            if match and (match.group(1) or match.group(2)):
+                if match.group(1):
+                    start = int(match.group(1))
+                    if match.group(2):
+                        end = min(int(match.group(2)), source.size - 1)
+                else:
+                    # bytes=-N 表示最后N个字节
+                    start = max(source.size - int(match.group(2)), 0)
+                status = 206
+            if start >= source.size or start > end:
+                self.send_response(416)
+                self.send_header('Content-Range', f"bytes */{source.size}")
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+
+        chunks = source.iter_range(start, end) if send_body else iter(())
+        try:
+            # 先取到第一块再发送响应头，上游出错时还能返回502
+            first_chunk = next(chunks, b'')
+        except (IOError, OSError, http.client.HTTPException) as e:
+            self.send_error(502, explain=str(e))
+            return
+
+        self.send_response(status)
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Length', str(end - start + 1))
+        if status == 206:
+            self.send_header('Content-Range', f"bytes {start}-{end}/{source.size}")
+        self.end_headers()
+        if not send_body:
+            return
+        try:
+            self.wfile.write(first_chunk)
+            for chunk in chunks:
+                self.wfile.write(chunk)
+        except (BrokenPipeError, ConnectionResetError):
+            # FFmpeg跳转时会直接断开当前连接，之后的块不再读取
+            self.close_connection = True
+        except (IOError, OSError, http.client.HTTPException):
+            self.close_connection = True
+
+def _source_token(url):
+    """
+    远程地址在代理路径中使用的标识
+    """
+    return hashlib.sha1(url.encode('utf-8')).hexdigest()[:16]
+
+class RangeProxy:
+    """
+    本机范围读取代理：FFmpeg和ffprobe通过它读取远程源视频，只下载实际用到的字节范围
+    """
+
+    def __init__(self):
+        self.pool = _ConnectionPool()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _ProxyHandler)
+        self.server.daemon_threads = True
+        self.server.sources = {}
+        self._by_url = {}
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def source(self, url):
+        with self._lock:
+            source = self._by_url.get(url)
+            if source is None:
+                source = RemoteSource(url, self.pool)
+                self.server.sources[_source_token(url)] = source
+                self._by_url[url] = source
+                trim_cache(keep=source.cache_dir)
+        return source
+
+    def local_url(self, url):
+        """
+        返回远程地址在代理上的本机地址，保留原文件名以便FFmpeg根据扩展名识别格式
+        """
+        self.source(url)
+        name = os.path.basename(urlsplit(url).path) or 'source'
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/{_source_token(url)}/{quote(name)}"
+
+_proxy = None
+_proxy_lock = threading.Lock()
+
+def get_range_proxy():
+    """
+    返回进程内共享的范围读取代理，首次调用时启动
+    """
+    global _proxy
+    with _proxy_lock:
+        if _proxy is None:
+            _proxy = RangeProxy()
+        return _proxy
+
+def resolve_source(path):
+    """
+    返回交给FFmpeg/ffprobe读取的输入地址：本地文件原样返回，HTTP(S)地址改为经过本机代理读取
+    """
+    if not is_url(path):
+        return path
+    return get_range_proxy().local_url(path)
+
+def source_size(path):
+    """
+    返回源文件大小（字节），远程文件使用服务器报告的大小
+    """
+    if not is_url(path):
+        return os.path.getsize(path)
+    return get_range_proxy().source(path).size
+
+def source_signature(path):
+    """
+    返回用于判断源文件是否变化的标识，本地文件为大小和修改时间
+    """
+    if not is_url(path):
+        stat = os.stat(path)
+        return {'size': stat.st_size, 'mtime': stat.st_mtime}
+    return get_range_proxy().source(path).signature()
+
+def transfer_stats(path):
+    """
+    返回远程源文件的 (从上游下载的字节数, 提供给FFmpeg的字节数, 文件大小)，本地文件返回None
+    """
+    if not is_url(path):
+        return None
+    return get_range_proxy().source(path).stats()
+
+def trim_cache(max_bytes=CACHE_MAX_BYTES, keep=None):
+    """
+    缓存超过上限时，按最近使用时间从旧到新删除其他源文件的缓存
+    """
+    try:
+        names = os.listdir(HTTP_CACHE_DIR)
+    except OSError:
+        return
+    entries = []
+    total = 0
+    for name in names:
+        path = os.path.join(HTTP_CACHE_DIR, name)
+        try:
+            size = sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+            mtime = os.path.getmtime(os.path.join(path, 'meta.json'))
+        except OSError:
+            continue
+        entries.append((mtime, path, size))
+        total += size
+    for _, path, size in sorted(entries):
+        if total <= max_bytes:
+            break
+        if path != keep:
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+class RangeFileHandler(SimpleHTTPRequestHandler):
+    """
+    支持范围请求的静态文件服务，用于在本机模拟对象存储进行测试
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    def send_head(self):
+        path = self.translate_path(self.path)
+        if not os.path.isfile(path):
+            return super().send_head()
+        size = os.path.getsize(path)
+        match = RANGE_RE.match(self.headers.get('Range', '').strip())
+        if not match or not (match.group(1) or match.group(2)):
+            self._range = None
+            return super().send_head()
+
+        if match.group(1):
+            start = int(match.group(1))
+            end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+        else:
+            start, end = max(size - int(match.group(2)), 0), size - 1
+        if start >= size or start > end:
+            self.send_response(416)
+            self.send_header('Content-Range', f"bytes */{size}")
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return None
+        f = open(path, 'rb')
+        f.seek(start)
+        self._range = end - start + 1
+        self.send_response(206)
+        self.send_header('Content-Type', self.guess_type(path))
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Content-Range', f"bytes {start}-{end}/{size}")
+        self.send_header('Content-Length', str(self._range))
+        self.send_header('Last-Modified', self.date_time_string(int(os.path.getmtime(path))))
+        self.end_headers()
+        return f
+
+    def copyfile(self, source, outputfile):
+        if getattr(self, '_range', None) is None:
+            return super().copyfile(source, outputfile)
+        remaining = self._range
+        while remaining > 0:
+            data = source.read(min(remaining, 64 * 1024))
+            if not data:
+                break
+            outputfile.write(data)
+            remaining -= len(data)
+
+def serve(directory, port=8000, bind='127.0.0.1'):
+    """
+    在本机启动支持范围请求的静态文件服务
+    """
+    handler = lambda *args, **kwargs: RangeFileHandler(*args, directory=directory, **kwargs)
+    server = ThreadingHTTPServer((bind, port), handler)
+    print(f"正在提供 {os.path.abspath(directory)}: http://{bind}:{server.server_address[1]}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='远程源视频的范围读取工具')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    serve_parser = subparsers.add_parser('serve', help='在本机启动支持范围请求的文件服务，用于测试')
+    serve_parser.add_argument('directory', help='要提供的目录')
+    serve_parser.add_argument('--port', type=int, default=8000, help='端口')
+    serve_parser.add_argument('--bind', default='127.0.0.1', help='监听地址')
+    subparsers.add_parser('clear-cache', help='删除全部缓存块')
+    args = parser.parse_args(argv)
+
+    if args.command == 'serve':
+        serve(args.directory, args.port, args.bind)
+    elif args.command == 'clear-cache':
+        shutil.rmtree(HTTP_CACHE_DIR, ignore_errors=True)
+        print(f"已删除缓存: {HTTP_CACHE_DIR}")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+import json
+import subprocess
+
+def probe_media(path):
+    """
+    使用ffprobe读取媒体文件的容器和流信息，只读取元数据，不解码
+
+    返回ffprobe的JSON结果（包含format和streams），失败时返回None
+    """
+    cmd = [
+        'ffprobe', '-v', 'error',
+        '-show_format', '-show_streams',
+        '-of', 'json',
+        path
+    ]
+    try:
+        process = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                 text=True, encoding='utf-8', errors='replace')
+    except (subprocess.SubprocessError, FileNotFoundError):
+        return None
+    if process.returncode != 0:
+        return None
+    try:
+        return json.loads(process.stdout)
+    except ValueError:
+        return None
+
+def media_duration(info):
+    """
+    从probe_media的结果中取出时长（秒），无法获取时返回None
+    """
+    if not info:
+        return None
+    try:
+        return float(info['format']['duration'])
+    except (KeyError, ValueError):
+        return None
+
+def stream_types(info):
+    """
+    从probe_media的结果中取出包含的流类型集合，例如 {'video', 'audio'}
+    """
+    if not info:
+        return set()
+    return {s.get('codec_type') for s in info.get('streams', [])}
+
+def video_height(info):
+    """
+    从probe_media的结果中取出第一个视频流的高度，无法获取时返回None
+    """
+    if not info:
+        return None
+    video = next((s for s in info.get('streams', []) if s.get('codec_type') == 'video'), None)
+    try:
+        return int(video['height'])
+    except (TypeError, KeyError, ValueError):
+        return None
+
+def probe_duration(path):
+    """
+    返回媒体文件的时长（秒），无法获取时返回None
+    """
+    return media_duration(probe_media(path))
+
+def probe_first_video_frame(path):
+    """
+    只读取第一个视频帧的元数据，返回 (是否为关键帧, 显示时间)，无法获取时返回None
+    """
+    cmd = [
+        'ffprobe', '-v', 'error',
+        '-select_streams', 'v:0',
+        '-read_intervals', '%+#1',
+        '-show_entries', 'frame=key_frame,pts_time,best_effort_timestamp_time',
+        '-of', 'json',
+        path
+    ]
+    try:
+        process = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                 text=True, encoding='utf-8', errors='replace')
+        frame = json.loads(process.stdout)['frames'][0]
+    except (subprocess.SubprocessError, FileNotFoundError, ValueError, KeyError, IndexError):
+        return None
+    pts_time = frame.get('pts_time', frame.get('best_effort_timestamp_time', 0))
+    return frame.get('key_frame') == 1, float(pts_time)
+
+def video_rotation(stream):
+    """
+    返回视频流的显示旋转角度（0、90、180或270），没有旋转信息时为0
+
+    手机拍摄的视频通常以横向画面存储，再通过显示矩阵（旧版本为rotate标签）标记旋转
+    """
+    rotation = stream.get('tags', {}).get('rotate', 0)
+    for side_data in stream.get('side_data_list', []):
+        if 'rotation' in side_data:
+            rotation = side_data['rotation']
+    try:
+        return int(round(float(rotation))) % 360
+    except (TypeError, ValueError):
+        return 0
+
+def video_stream_info(info):
+    """
+    从probe_media的结果中取出第一个视频流的宽、高、帧率以及是否包含音频流
+
+    FFmpeg解码时会按旋转信息自动旋转画面，旋转90度或270度时返回的宽高已互换，与解码输出的画面一致
+
+    返回 (width, height, fps, has_audio)，无法获取时返回None
+    """
+    if not info:
+        return None
+    streams = info.get('streams', [])
+    video = next((s for s in streams if s.get('codec_type') == 'video'), None)
+    if video is None:
+        return None
+    num, _, den = video.get('avg_frame_rate', '0/0').partition('/')
+    if not den or float(den) == 0 or float(num) == 0:
+        num, _, den = video.get('r_frame_rate', '25/1').partition('/')
+    fps = float(num) / float(den or 1)
+    has_audio = any(s.get('codec_type') == 'audio' for s in streams)
+    width, height = int(video['width']), int(video['height'])
+    if video_rotation(video) in (90, 270):
+        width, height = height, width
+    return width, height, fps, has_audio
+
+def probe_video_stream(path):
+    """
+    返回文件第一个视频流的 (width, height, fps, has_audio)，无法获取时返回None，见video_stream_info
+    """
+    return video_stream_info(probe_media(path))
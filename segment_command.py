@@ -0,0 +1,157 @@
+import os
+from encode_profiles import DEFAULT_PROFILE, build_encode_args, video_filter
+
+# 音频降噪滤镜：高通、低通和FFT降噪
+NOISE_REDUCTION_FILTER = 'highpass=f=200,lowpass=f=3000,afftdn=nf=-25'
+
+# 代理文件输出到输出目录下的子目录中，文件名与正式片段一致
+PROXY_DIR_NAME = 'proxy'
+PROXY_PROFILE = 'proxy'
+POSTER_WIDTH = 320
+
+# 仅音频模式的输出格式：扩展名、编码参数和用于估算输出大小的码率（kbit/s）
+AUDIO_FORMATS = {
+    'aac': {
+        'label': 'AAC (.m4a)',
+        'ext': '.m4a',
+        'codec': 'aac',
+        'args': ['-c:a', 'aac', '-b:a', '128k'],
+        'bitrate': 128,
+    },
+    'opus': {
+        'label': 'Opus (.opus)',
+        'ext': '.opus',
+        'codec': 'libopus',
+        'args': ['-c:a', 'libopus', '-b:a', '64k'],
+        'bitrate': 64,
+    },
+    'wav': {
+        'label': 'WAV (.wav)',
+        'ext': '.wav',
+        'codec': 'pcm_s16le',
+        'args': ['-c:a', 'pcm_s16le'],
+        # 保持源音频的采样率和声道数，按48kHz立体声估算
+        'bitrate': 1536,
+    },
+}
+
+def audio_path_for(output_path, audio_format):
+    """
+    返回片段对应的音频文件路径，例如 output/1-xxx.mp4 -> output/1-xxx.m4a
+    """
+    return os.path.splitext(output_path)[0] + AUDIO_FORMATS[audio_format]['ext']
+
+def build_audio_command(video_path, start_sec, duration, output_path, audio_format='aac', noise_reduction=True):
+    """
+    构建只提取单个片段音频的FFmpeg命令，不解码视频
+
+    参数:
+        video_path: 源视频路径
+        start_sec: 片段开始时间（秒）
+        duration: 片段时长（秒）
+        output_path: 输出文件路径，扩展名应与audio_format一致
+        audio_format: 输出格式，见AUDIO_FORMATS
+        noise_reduction: 是否应用噪音降低处理
+    """
+    if audio_format not in AUDIO_FORMATS:
+        raise ValueError(f"未知的音频格式: {audio_format}")
+    # 只映射音频流，FFmpeg不会为视频流创建解码器
+    cmd = [
+        'ffmpeg',
+        '-ss', f"{start_sec:.3f}",
+        '-t', f"{duration:.3f}",
+        '-i', video_path,
+        '-map', '0:a:0',
+        '-vn', '-sn', '-dn',
+    ]
+    if noise_reduction:
+        cmd.extend(['-af', NOISE_REDUCTION_FILTER])
+    cmd.extend(AUDIO_FORMATS[audio_format]['args'])
+    cmd.extend(['-y', output_path])
+    return cmd
+
+def proxy_paths_for(output_path, proxy_dir=None):
+    """
+    返回片段对应的代理视频和封面帧路径
+    例如 output/1-xxx.mp4 -> (output/proxy/1-xxx.mp4, output/proxy/1-xxx.jpg)
+    proxy_dir 为None时使用片段所在目录下的proxy子目录
+    """
+    output_dir, output_filename = os.path.split(output_path)
+    base_name = os.path.splitext(output_filename)[0]
+    if proxy_dir is None:
+        proxy_dir = os.path.join(output_dir, PROXY_DIR_NAME)
+    return os.path.join(proxy_dir, f"{base_name}.mp4"), os.path.join(proxy_dir, f"{base_name}.jpg")
+
+def build_segment_command(video_path, start_sec, duration, output_path, profile=DEFAULT_PROFILE,
+                          noise_reduction=True, proxy=False, proxy_dir=None):
+    """
+    构建切割单个片段的FFmpeg命令
+
+    参数:
+        video_path: 源视频路径
+        start_sec: 片段开始时间（秒）
+        duration: 片段时长（秒）
+        output_path: 输出文件路径
+        profile: 编码配置名称
+        noise_reduction: 是否应用噪音降低处理
+        proxy: 是否在同一次解码中同时输出低分辨率代理视频和封面帧
+        proxy_dir: 代理文件的输出目录，默认为output_path所在目录下的proxy子目录
+    """
+    # -ss/-t 作为输入参数，直接定位到片段起点，不必从文件开头解码；
+    # 重新编码时输入定位是帧精确的，并且对同一命令中的所有输出同时生效
+    cmd = [
+        'ffmpeg',
+        '-ss', f"{start_sec:.3f}",
+        '-t', f"{duration:.3f}",
+        '-i', video_path,
+    ]
+
+    audio_args = ['-af', NOISE_REDUCTION_FILTER] if noise_reduction else []
+
+    if not proxy:
+        vf = video_filter(profile)
+        if vf:
+            cmd.extend(['-vf', vf])
+        cmd.extend(build_encode_args(profile))
+        cmd.extend(audio_args)
+        cmd.extend([
+            '-avoid_negative_ts', '1',
+            '-y',               # 覆盖已存在的文件
+            output_path
+        ])
+        return cmd
+
+    proxy_path, poster_path = proxy_paths_for(output_path, proxy_dir)
+    os.makedirs(os.path.dirname(proxy_path), exist_ok=True)
+
+    # 解码一次，拆分为正式片段、代理视频和封面帧三路
+    # 封面取片段开头附近的一帧，避开片头常见的黑场
+    poster_time = min(duration / 10, 3)
+    full_vf = video_filter(profile)
+    graph = [
+        '[0:v]split=3[full][proxy][poster]',
+        f"[proxy]{video_filter(PROXY_PROFILE)}[proxy_out]",
+        f"[poster]select='gte(t,{poster_time:.3f})',scale={POSTER_WIDTH}:-2[poster_out]",
+        f"[full]{full_vf}[full_out]" if full_vf else '[full]null[full_out]',
+    ]
+    cmd.extend(['-filter_complex', ';'.join(graph)])
+
+    # 代理视频排在最前，并使用分片MP4，写入过程中即可开始预览
+    cmd.extend(['-map', '[proxy_out]', '-map', '0:a?'])
+    cmd.extend(build_encode_args(PROXY_PROFILE))
+    cmd.extend([
+        '-movflags', '+frag_keyframe+empty_moov+default_base_moof',
+        '-avoid_negative_ts', '1',
+        '-y', proxy_path,
+    ])
+
+    cmd.extend(['-map', '[poster_out]', '-frames:v', '1', '-y', poster_path])
+
+    cmd.extend(['-map', '[full_out]', '-map', '0:a?'])
+    cmd.extend(build_encode_args(profile))
+    cmd.extend(audio_args)
+    cmd.extend([
+        '-avoid_negative_ts', '1',
+        '-y', output_path,
+    ])
+    return cmd
@@ -0,0 +1,318 @@
+import os
+import shutil
+import subprocess
+import time
+from datetime import timedelta
+from cut_points import load_cut_plan
+from media_probe import probe_media, media_duration, stream_types, video_height
+from encode_profiles import DEFAULT_PROFILE, ENCODE_PROFILES, get_profile, load_calibration, estimate_encode_seconds
+from ffmpeg_caps import get_ffmpeg_capabilities, has_encoder, has_filter
+from segment_command import (PROXY_DIR_NAME, AUDIO_FORMATS, build_segment_command, build_audio_command,
+                             proxy_paths_for, audio_path_for)
+from staging import DEFAULT_SCRATCH_DIR, SegmentPublisher, create_job_dir, preflight_disk_space
+from verify_output import SegmentVerifier
+from stream_package import build_stream_command, stream_dir_for, master_playlist_path
+from subtitles import read_srt, slice_cues, write_srt, subtitle_path_for
+from http_source import resolve_source, transfer_stats
+
+def format_duration(seconds):
+    """
+    将秒数格式化为人类可读的时间格式
+    """
+    return str(timedelta(seconds=int(seconds)))
+
+class SplitResult:
+    """
+    一次切割任务的结果
+
+    ok 为False时 message 是失败或取消的原因，否则是处理完成的汇总信息；
+    failed_verification 为 [(最终路径, 问题列表)]；任务没有开始编码时 output_dir 为空字符串
+    """
+
+    def __init__(self, ok, message, output_dir='', successful=0, total=0, failed_verification=()):
+        self.ok = ok
+        self.message = message
+        self.output_dir = output_dir
+        self.successful = successful
+        self.total = total
+        self.failed_verification = list(failed_verification)
+
+def _ignore(*args):
+    pass
+
+def run_split_job(video_path, cut_points_path, output_dir, noise_reduction=True, profile=DEFAULT_PROFILE,
+                  proxy=False, scratch_dir=DEFAULT_SCRATCH_DIR, sample_decode=False, stream_format=None,
+                  audio_format=None, subtitles_path=None, log=print, cancelled=None, on_planned=_ignore,
+                  on_progress=_ignore):
+    """
+    使用FFmpeg根据切割点文件切割视频，命令行和图形界面共用
+
+    开始编码前依次检查FFmpeg能力、源视频、切割点、字幕和磁盘空间，任何一项不满足时不开始处理；
+    片段在暂存目录中编码，后台校验通过后发布到输出目录
+
+    参数:
+        video_path: 源视频路径或HTTP(S)地址，远程源视频只下载用到的字节范围
+        cut_points_path: 切割点文件路径
+        output_dir: 输出目录
+        noise_reduction: 是否应用噪音降低处理
+        profile: 编码配置名称，见encode_profiles.ENCODE_PROFILES
+        proxy: 是否同时在输出目录的proxy子目录中生成低分辨率预览代理和封面帧
+        scratch_dir: 暂存目录，片段先在此编码，完成后再原子地发布到输出目录
+        sample_decode: 校验片段时是否额外抽样解码几帧
+        stream_format: 为'hls'或'dash'时，每个片段直接打包为多码率流媒体目录，而不是单个MP4文件
+        audio_format: 为'aac'、'opus'或'wav'时只提取每个片段的音频，不解码视频，见segment_command.AUDIO_FORMATS
+        subtitles_path: SRT字幕文件路径，提供时为每个片段输出平移到从0开始的字幕切片
+        log: 日志输出函数
+        cancelled: 返回True时在下一个片段开始前停止处理，默认不会取消
+        on_planned: 切割计划确定后以片段总数调用
+        on_progress: 每个片段处理完成后以 (已处理片段数, 状态消息) 调用
+
+    返回SplitResult
+    """
+    # 记录开始时间
+    start_time = time.time()
+
+    # 检查FFmpeg是否安装（能力信息会缓存，FFmpeg未更换时不再启动进程探测）
+    caps = get_ffmpeg_capabilities()
+    if caps is None:
+        log("错误: 未找到FFmpeg。请确保FFmpeg已安装并添加到系统PATH中。")
+        log("您可以从 https://ffmpeg.org/download.html 下载FFmpeg。")
+        return SplitResult(False, "FFmpeg未安装")
+    if audio_format:
+        codec = AUDIO_FORMATS[audio_format]['codec']
+    else:
+        codec = get_profile(profile)['video_codec']
+    if not has_encoder(caps, codec):
+        log(f"错误: 当前FFmpeg不支持编码器 {codec}，请更换FFmpeg版本。")
+        return SplitResult(False, f"FFmpeg不支持编码器 {codec}")
+    if noise_reduction and not has_filter(caps, 'afftdn'):
+        log("警告: 当前FFmpeg不支持afftdn滤镜，已关闭音频降噪处理")
+        noise_reduction = False
+    if audio_format and (proxy or stream_format):
+        log("警告: 仅音频模式下不生成预览代理，也不打包流媒体")
+        proxy = False
+        stream_format = None
+    if stream_format and proxy:
+        log("警告: 流媒体打包模式下不生成预览代理")
+        proxy = False
+
+    # 确保输出目录存在
+    try:
+        os.makedirs(output_dir, exist_ok=True)
+    except OSError as e:
+        log(f"无法创建输出目录 {output_dir}: {e}")
+        return SplitResult(False, f"无法创建输出目录: {e}")
+
+    # 远程源视频经本机代理读取：按块缓存，连接在各片段之间复用
+    try:
+        input_path = resolve_source(video_path)
+    except IOError as e:
+        log(f"无法访问源视频: {e}")
+        return SplitResult(False, f"无法访问源视频: {e}")
+
+    # 读取并校验全部切割点，有错误时不开始处理
+    source_info = probe_media(input_path)
+    try:
+        plan = load_cut_plan(cut_points_path, media_duration(source_info))
+    except (OSError, ValueError) as e:
+        log(f"读取切割点文件时出错: {e}")
+        return SplitResult(False, f"读取切割点文件时出错: {e}")
+    for warning in plan.warnings:
+        log(f"警告: {warning}")
+    if not plan.ok:
+        log("切割点文件有以下错误，请修改后重试:")
+        for error in plan.errors:
+            log(f"  {error}")
+        return SplitResult(False, f"切割点文件有 {len(plan.errors)} 处错误", total=len(plan))
+
+    # 源视频有音频时要求每个片段也有音频；无法探测源视频时按有音频处理
+    has_audio = not source_info or 'audio' in stream_types(source_info)
+    if audio_format and not has_audio:
+        log("错误: 源视频不包含音频流，无法使用仅音频模式")
+        return SplitResult(False, "源视频不包含音频流", total=len(plan))
+
+    cues = None
+    if subtitles_path:
+        try:
+            cues = read_srt(subtitles_path)
+        except (OSError, ValueError) as e:
+            log(f"读取字幕文件时出错: {e}")
+            return SplitResult(False, f"读取字幕文件时出错: {e}", total=len(plan))
+        log(f"已读取字幕文件: {subtitles_path}，共 {len(cues)} 条字幕")
+
+    log(f"正在处理视频: {video_path}")
+    log(f"共发现 {len(plan)} 个切割点")
+    on_planned(len(plan))
+
+    if audio_format:
+        # 编码速度校准只针对视频编码配置，仅音频模式按本次已处理的速度推算
+        calibration = {}
+        log(f"仅提取音频: {AUDIO_FORMATS[audio_format]['label']}")
+    else:
+        calibration = load_calibration()
+        eta = estimate_encode_seconds(profile, plan.total_duration, calibration)
+        if eta is not None:
+            log(f"编码配置: {ENCODE_PROFILES[profile]['label']}，预计总耗时: {format_duration(eta)}")
+        else:
+            log(f"编码配置: {ENCODE_PROFILES[profile]['label']}（未校准，运行 encode_profiles.py calibrate 可获得耗时预估）")
+
+    # 检查暂存目录和输出目录的剩余空间
+    try:
+        job_dir = create_job_dir(scratch_dir)
+    except OSError as e:
+        log(f"无法创建暂存目录 {scratch_dir}: {e}")
+        return SplitResult(False, f"无法创建暂存目录: {e}", total=len(plan))
+    try:
+        # 流媒体打包的码率由码率阶梯决定，不使用编码配置的校准结果
+        estimate, problems = preflight_disk_space(video_path, plan, output_dir, job_dir, audio_format,
+                                                  None if stream_format else profile)
+    except OSError as e:
+        log(f"检查磁盘空间时出错: {e}")
+        shutil.rmtree(job_dir, ignore_errors=True)
+        return SplitResult(False, f"检查磁盘空间时出错: {e}", total=len(plan))
+    if estimate is not None:
+        log(f"预计输出大小: {estimate / 1024 ** 3:.2f} GB")
+    if problems:
+        log("磁盘空间不足，无法开始处理:")
+        for problem in problems:
+            log(f"  {problem}")
+        shutil.rmtree(job_dir, ignore_errors=True)
+        return SplitResult(False, "磁盘空间不足", total=len(plan))
+
+    job = {
+        'input_path': input_path,
+        'output_dir': output_dir,
+        'job_dir': job_dir,
+        'noise_reduction': noise_reduction,
+        'profile': profile,
+        'proxy': proxy,
+        'stream_format': stream_format,
+        'audio_format': audio_format,
+        'source_height': video_height(source_info),
+        'has_audio': has_audio,
+        'cues': cues,
+    }
+    publisher = SegmentPublisher(log=log)
+    verifier = SegmentVerifier(publisher, expect_audio=has_audio, sample_decode=sample_decode, log=log,
+                               expect_video=not audio_format)
+    try:
+        completed = _encode_segments(plan, job, verifier, start_time, calibration, log,
+                                     cancelled or (lambda: False), on_progress)
+    finally:
+        # 等待校验和发布完成后清理暂存目录
+        verify_results = verifier.wait()
+        publish_results = publisher.wait()
+        shutil.rmtree(job_dir, ignore_errors=True)
+    successful_clips = sum(1 for _, published in publish_results if published)
+    failed_verification = [(path, problems) for path, problems in verify_results if problems]
+
+    if not completed:
+        log("处理已取消")
+        return SplitResult(False, "处理已取消", output_dir, successful_clips, len(plan), failed_verification)
+
+    # 计算总耗时
+    total_time = time.time() - start_time
+
+    summary = "\n===== 视频切割完成 =====\n"
+    summary += f"成功处理片段数: {successful_clips}/{len(plan)}\n"
+    if failed_verification:
+        summary += f"校验未通过片段数: {len(failed_verification)}\n"
+        for path, problems in failed_verification:
+            summary += f"  {os.path.basename(path)}: {'；'.join(problems)}\n"
+    summary += f"总耗时: {format_duration(total_time)}\n"
+    stats = transfer_stats(video_path)
+    if stats:
+        fetched, served, size = stats
+        summary += (f"网络下载: {fetched / 1024 ** 2:.1f} MB / 源文件 {size / 1024 ** 2:.1f} MB"
+                    f"（FFmpeg共读取 {served / 1024 ** 2:.1f} MB，其余来自本地缓存）\n")
+    summary += f"输出目录: {output_dir}"
+    log(summary)
+    return SplitResult(True, summary, output_dir, successful_clips, len(plan), failed_verification)
+
+def _encode_segments(plan, job, verifier, start_time, calibration, log, cancelled, on_progress):
+    """
+    依次编码全部片段到暂存目录并交给校验器（校验通过后发布），被取消时返回False
+    """
+    # 按开始时间顺序处理每个切割点，使对源文件的读取保持顺序
+    encoded_clips = 0
+    processed_media_seconds = 0
+    proxy_dir = os.path.join(job['output_dir'], PROXY_DIR_NAME)
+    audio_format = job['audio_format']
+    stream_format = job['stream_format']
+
+    for position, segment in enumerate(plan.in_read_order()):
+        if cancelled():
+            return False
+
+        i = segment.index - 1
+        clip_name = segment.name
+        duration = segment.duration
+
+        log(f"正在处理第{i+1}个片段: {segment.start_str}~{segment.end_str}，{clip_name}")
+        on_progress(position, f"处理中: {clip_name}")
+
+        # 设置输出文件名（添加序号前缀），先写入暂存目录
+        output_path = os.path.join(job['output_dir'], segment.output_filename)
+        staged_path = os.path.join(job['job_dir'], segment.output_filename)
+
+        # 构建FFmpeg命令，正式片段写入暂存目录，预览代理直接写入输出目录
+        master_playlist = None
+        if audio_format:
+            # 仅音频：只映射音频流，不解码视频
+            output_path = audio_path_for(output_path, audio_format)
+            staged_path = audio_path_for(staged_path, audio_format)
+            cmd = build_audio_command(job['input_path'], segment.start, duration, staged_path,
+                                      audio_format, job['noise_reduction'])
+        elif stream_format:
+            # 流媒体打包：每个片段输出为一个目录，包含各档位的播放列表和分片
+            output_path = stream_dir_for(output_path)
+            staged_path = stream_dir_for(staged_path)
+            master_playlist = master_playlist_path(staged_path, clip_name)
+            cmd = build_stream_command(job['input_path'], segment.start, duration, staged_path, clip_name,
+                                       job['profile'], job['noise_reduction'], stream_format,
+                                       job['source_height'], job['has_audio'])
+        else:
+            cmd = build_segment_command(job['input_path'], segment.start, duration, staged_path,
+                                        job['profile'], job['noise_reduction'], job['proxy'], proxy_dir)
+        log(f"正在保存: {output_path}")
+        if job['proxy']:
+            log(f"同时生成预览代理: {proxy_paths_for(output_path)[0]}")
+
+        try:
+            # 执行FFmpeg命令
+            process = subprocess.run(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                encoding='utf-8'
+            )
+
+            if process.returncode == 0:
+                log(f"片段 {i+1} 编码完成")
+                encoded_clips += 1
+                companions = []
+                if job['cues'] is not None:
+                    # 字幕切片写入暂存目录，片段校验通过后随片段一起发布
+                    staged_subtitle = subtitle_path_for(staged_path)
+                    write_srt(slice_cues(job['cues'], segment.start, segment.end), staged_subtitle)
+                    companions.append((staged_subtitle, subtitle_path_for(output_path)))
+                # 在后台校验，通过后发布到输出目录，同时开始编码下一个片段
+                verifier.submit(staged_path, output_path, duration, companions, master_playlist)
+            else:
+                log(f"处理片段 {i+1} 时出错:")
+                log(process.stderr)
+        except Exception as e:
+            log(f"处理片段 {i+1} 时发生异常: {e}")
+        processed_media_seconds += duration
+
+        # 更新进度，优先使用校准的编码速度估算剩余时间，否则按本次已处理的速度推算
+        status = f"已完成: {encoded_clips}/{len(plan)}"
+        remaining_media_seconds = max(plan.total_duration - processed_media_seconds, 0)
+        eta = estimate_encode_seconds(job['profile'], remaining_media_seconds, calibration)
+        if eta is None and processed_media_seconds > 0:
+            eta = (time.time() - start_time) / processed_media_seconds * remaining_media_seconds
+        if eta is not None:
+            status += f"，预计剩余: {format_duration(eta)}"
+        on_progress(position + 1, status)
+    return True
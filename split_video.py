@@ -1,90 +1,219 @@
 import os
-# 尝试这些导入方式
-import moviepy
-from moviepy.editor import *
-import re
+import queue
+import tempfile
+import threading
+import subprocess
+import numpy as np
+from cut_points import load_cut_plan
+from media_probe import probe_media, media_duration, video_stream_info
+from http_source import is_url, resolve_source
+from encode_profiles import DEFAULT_PROFILE, build_encode_args, video_filter
 
-def time_to_seconds(time_str):
+# 每批在读取端和写入端之间传递的帧数，以及循环使用的缓冲区个数
+# 内存占用上限约为 BATCH_FRAMES * BUFFER_COUNT 帧原始画面，与片段长度无关
+BATCH_FRAMES = 16
+BUFFER_COUNT = 2
+
+# 原始画面使用yuv420p，每像素1.5字节，比rgb24少一半的拷贝量
+RAW_PIX_FMT = 'yuv420p'
+
+def _read_full(stream, view):
     """
-    将时间字符串转换为秒数
-    支持格式：HH:MM:SS 或 MM:SS 或 SS
+    从管道中读满给定的缓冲区，返回实际读取的字节数（文件结束时可能不足）
     """
-    parts = time_str.split(':')
-    if len(parts) == 3:  # HH:MM:SS
-        return int(parts[0]) * 3600 + int(parts[1]) * 60 + float(parts[2])
-    elif len(parts) == 2:  # MM:SS
-        return int(parts[0]) * 60 + float(parts[1])
-    else:  # SS
-        return float(parts[0])
-
-def split_video(video_path, cut_points_path, output_dir=None):
+    total = 0
+    while total < len(view):
+        n = stream.readinto(view[total:])
+        if not n:
+            break
+        total += n
+    return total
+
+def _feed_batches(reader, buffers, free, filled, frame_size):
     """
-    根据切割点文件切割视频
-    
+    读取线程：把解码出的原始帧成批读入空闲缓冲区，交给写入端
+    """
+    try:
+        while True:
+            index = free.get()
+            view = memoryview(buffers[index]).cast('B')
+            nbytes = _read_full(reader.stdout, view)
+            frames = nbytes // frame_size
+            if frames:
+                filled.put((index, frames))
+            if nbytes < len(view):
+                break
+    finally:
+        filled.put(None)
+
+def split_segment(video_path, start, duration, output_path, stream_info, profile=DEFAULT_PROFILE,
+                  batch_frames=BATCH_FRAMES):
+    """
+    以流水线方式切割单个片段
+
+    读取端FFmpeg解码出原始帧，经由循环使用的NumPy批缓冲区交给写入端FFmpeg编码，
+    Python侧不会为每一帧分配新对象；音频由写入端直接从源文件读取，不再需要临时音频文件
+
     参数:
         video_path: 源视频路径
+        start: 片段开始时间（秒）
+        duration: 片段时长（秒）
+        output_path: 输出文件路径
+        stream_info: video_stream_info 的返回值
+        profile: 编码配置名称
+        batch_frames: 每批传递的帧数
+
+    返回编码的帧数
+    """
+    width, height, fps, has_audio = stream_info
+    frame_size = width * height * 3 // 2
+
+    reader_cmd = [
+        'ffmpeg', '-v', 'error',
+        '-ss', f"{start:.3f}", '-t', f"{duration:.3f}",
+        '-i', video_path,
+        '-map', '0:v:0',
+        '-f', 'rawvideo', '-pix_fmt', RAW_PIX_FMT,
+        '-'
+    ]
+    writer_cmd = [
+        'ffmpeg', '-v', 'error',
+        '-f', 'rawvideo', '-pix_fmt', RAW_PIX_FMT,
+        '-s', f"{width}x{height}", '-r', f"{fps}",
+        '-i', '-',
+    ]
+    if has_audio:
+        writer_cmd.extend(['-ss', f"{start:.3f}", '-t', f"{duration:.3f}", '-i', video_path,
+                           '-map', '0:v', '-map', '1:a:0'])
+    vf = video_filter(profile)
+    if vf:
+        writer_cmd.extend(['-vf', vf])
+    writer_cmd.extend(build_encode_args(profile))
+    writer_cmd.extend(['-shortest', '-f', 'mp4', '-y', output_path])
+
+    buffers = [np.empty((batch_frames, frame_size), dtype=np.uint8) for _ in range(BUFFER_COUNT)]
+    free = queue.Queue()
+    filled = queue.Queue()
+    for index in range(BUFFER_COUNT):
+        free.put(index)
+
+    reader = subprocess.Popen(reader_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                              bufsize=0)
+    writer = subprocess.Popen(writer_cmd, stdin=subprocess.PIPE, stderr=subprocess.PIPE,
+                              bufsize=0)
+    # 单独读取两端的错误输出，避免管道写满后互相阻塞
+    reader_errors = []
+    writer_errors = []
+    error_threads = [
+        threading.Thread(target=lambda: reader_errors.append(reader.stderr.read()), daemon=True),
+        threading.Thread(target=lambda: writer_errors.append(writer.stderr.read()), daemon=True),
+    ]
+    for thread in error_threads:
+        thread.start()
+    feeder = threading.Thread(target=_feed_batches, args=(reader, buffers, free, filled, frame_size),
+                              daemon=True)
+    feeder.start()
+
+    frames_written = 0
+    reader_finished = False
+    try:
+        while True:
+            item = filled.get()
+            if item is None:
+                reader_finished = True
+                break
+            index, frames = item
+            writer.stdin.write(memoryview(buffers[index][:frames]).cast('B'))
+            frames_written += frames
+            free.put(index)
+    except BrokenPipeError:
+        # 写入端提前关闭了管道，例如使用 -shortest 时音频先结束
+        pass
+    finally:
+        writer.stdin.close()
+        # 读取端还没读完时让它结束；读取线程可能正在等待空闲缓冲区，先放回一个再等待
+        if not reader_finished:
+            reader.terminate()
+        free.put(0)
+        feeder.join()
+        reader.wait()
+        writer.wait()
+        for thread in error_threads:
+            thread.join()
+
+    if writer.returncode != 0:
+        raise RuntimeError(b''.join(writer_errors).decode('utf-8', errors='replace'))
+    # 读取端是被主动结束的不算错误；自行退出且失败时说明解码不完整
+    if reader_finished and reader.returncode != 0:
+        detail = b''.join(reader_errors).decode('utf-8', errors='replace').strip()
+        raise RuntimeError(detail or f"解码源视频失败，退出码 {reader.returncode}")
+    return frames_written
+
+def split_video(video_path, cut_points_path, output_dir=None, profile=DEFAULT_PROFILE):
+    """
+    根据切割点文件切割视频
+
+    参数:
+        video_path: 源视频路径或HTTP(S)地址
         cut_points_path: 切割点文件路径
-        output_dir: 输出目录，默认为源视频所在目录下的'output'文件夹
+        output_dir: 输出目录，默认为源视频所在目录下的'output'文件夹（远程源视频为当前目录下）
+        profile: 编码配置名称，见encode_profiles.ENCODE_PROFILES
     """
     # 设置输出目录
     if output_dir is None:
-        output_dir = os.path.join(os.path.dirname(video_path), 'output')
-    
+        video_dir = os.getcwd() if is_url(video_path) else os.path.dirname(video_path)
+        output_dir = os.path.join(video_dir, 'output')
+
     # 确保输出目录存在
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
-    
-    # 读取切割点文件
-    with open(cut_points_path, 'r', encoding='utf-8') as f:
-        cut_points = f.readlines()
-    
-    # 加载视频
+
+    # 读取视频流信息
     print(f"正在加载视频: {video_path}")
-    video = mpy.VideoFileClip(video_path)
-    
-    # 处理每个切割点
-    for i, point in enumerate(cut_points):
-        point = point.strip()
-        if not point:
-            continue
-        
-        # 解析切割点格式: 开始时间点~结束时间点，视频名称
-        match = re.match(r'([\d:\.]+)~([\d:\.]+)，(.+)', point)
-        if match:
-            start_time_str, end_time_str, clip_name = match.groups()
-            
-            # 转换时间为秒
-            start_time = time_to_seconds(start_time_str)
-            end_time = time_to_seconds(end_time_str)
-            
-            print(f"正在处理第{i+1}个片段: {start_time_str}~{end_time_str}，{clip_name}")
-            
-            # 提取视频片段
-            clip = video.subclip(start_time, end_time)
-            
-            # 设置输出文件名
-            output_filename = f"{clip_name}.mp4"
-            output_path = os.path.join(output_dir, output_filename)
-            
-            # 保存视频片段
-            print(f"正在保存: {output_path}")
-            clip.write_videofile(
-                output_path,
-                codec="libx264",
-                audio_codec="aac",
-                temp_audiofile="temp-audio.m4a",
-                remove_temp=True,
-                preset="medium",  # 可选: ultrafast, superfast, veryfast, faster, fast, medium, slow, slower, veryslow
-                threads=4
-            )
-            
-            # 释放内存
-            clip.close()
-        else:
-            print(f"警告: 无法解析切割点格式: {point}")
-    
-    # 关闭视频
-    video.close()
+    # 远程源视频经本机代理按需读取，只下载用到的字节范围
+    input_path = resolve_source(video_path)
+    source_info = probe_media(input_path)
+    stream_info = video_stream_info(source_info)
+    if stream_info is None:
+        print(f"错误: 无法读取视频信息: {video_path}")
+        return
+
+    # 读取并校验全部切割点，超出视频结尾的片段在开始处理前截断或报错
+    plan = load_cut_plan(cut_points_path, media_duration(source_info))
+    for warning in plan.warnings:
+        print(f"警告: {warning}")
+    if not plan.ok:
+        print("切割点文件有以下错误，请修改后重试:")
+        for error in plan.errors:
+            print(f"  {error}")
+        return
+
+    # 按开始时间顺序处理每个切割点
+    for i, segment in enumerate(plan.in_read_order()):
+        print(f"正在处理第{i+1}个片段: {segment.start_str}~{segment.end_str}，{segment.name}")
+
+        # 设置输出文件名
+        output_filename = f"{segment.name}.mp4"
+        output_path = os.path.join(output_dir, output_filename)
+
+        # 先写入本次任务独有的临时文件，完成后再改名，多个任务同时运行也不会互相覆盖；
+        # 临时文件不以.mp4结尾（Windows上开头的点不会隐藏文件），异常退出后不会被误认为已完成的片段
+        fd, temp_path = tempfile.mkstemp(prefix=f".{output_filename}.", suffix='.partial', dir=output_dir)
+        os.close(fd)
+        # mkstemp创建的文件只有本人可读写，改回普通输出文件的权限
+        os.chmod(temp_path, 0o644)
+
+        # 保存视频片段
+        print(f"正在保存: {output_path}")
+        try:
+            split_segment(input_path, segment.start, segment.duration, temp_path, stream_info, profile)
+            os.replace(temp_path, output_path)
+        except Exception as e:
+            print(f"处理片段 {i+1} 时出错: {e}")
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
     print("视频切割完成!")
 
 if __name__ == "__main__":
@@ -93,6 +222,6 @@ if __name__ == "__main__":
     video_path = os.path.join(video_dir, "test.mp4")
     cut_points_path = os.path.join(video_dir, "视频切割点.txt")
     output_dir = os.path.join(video_dir, "output")
-    
+
     # 执行视频切割
-    split_video(video_path, cut_points_path, output_dir)
\ No newline at end of file
+    split_video(video_path, cut_points_path, output_dir)
@@ -0,0 +1,186 @@
+import os
+import time
+import errno
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from http_source import source_size
+from segment_command import AUDIO_FORMATS
+from encode_profiles import estimate_encoded_bytes
+
+# 默认暂存目录：本机临时目录，通常比网络共享目录快得多
+DEFAULT_SCRATCH_DIR = os.path.join(tempfile.gettempdir(), 'echo_split_scratch')
+
+# 估算输出大小时在源视频码率基础上预留的余量，以及磁盘上至少保留的空闲空间
+SIZE_MARGIN = 1.2
+RESERVE_BYTES = 200 * 1024 * 1024
+
+# 超过该时间的暂存任务目录视为异常退出后的残留
+STALE_JOB_SECONDS = 24 * 3600
+
+def create_job_dir(scratch_dir):
+    """
+    在暂存目录中为本次任务创建独立的子目录，并顺便清理之前异常退出留下的任务目录
+    """
+    os.makedirs(scratch_dir, exist_ok=True)
+    now = time.time()
+    for name in os.listdir(scratch_dir):
+        path = os.path.join(scratch_dir, name)
+        if name.startswith('job-') and os.path.isdir(path):
+            try:
+                if now - os.path.getmtime(path) > STALE_JOB_SECONDS:
+                    shutil.rmtree(path, ignore_errors=True)
+            except OSError:
+                pass
+    return tempfile.mkdtemp(prefix='job-', dir=scratch_dir)
+
+def _partial_path(final_path):
+    """
+    发布过程中使用的临时文件名，隐藏且不以.mp4结尾，不会被误认为已完成的片段
+    """
+    directory, name = os.path.split(final_path)
+    return os.path.join(directory, f".{name}.partial")
+
+def _remove_path(path):
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    elif os.path.exists(path):
+        os.remove(path)
+
+def _move_into_place(source_path, final_path):
+    """
+    把source_path改名为final_path
+
+    文件直接覆盖；目录无法覆盖非空目录，先把已存在的旧版本改名到一旁，新版本改名到位后再删除旧版本，
+    改名失败时恢复旧版本，输出目录中始终有一个完整的版本
+    """
+    if not (os.path.isdir(source_path) or os.path.isdir(final_path)) or not os.path.lexists(final_path):
+        os.replace(source_path, final_path)
+        return
+    directory, name = os.path.split(final_path)
+    old_path = os.path.join(directory, f".{name}.old")
+    _remove_path(old_path)
+    os.rename(final_path, old_path)
+    try:
+        os.rename(source_path, final_path)
+    except BaseException:
+        os.rename(old_path, final_path)
+        raise
+    _remove_path(old_path)
+
+def publish_file(staged_path, final_path):
+    """
+    把暂存目录中已完成的文件原子地移动到输出目录
+
+    同一文件系统上直接改名；跨文件系统时先复制为临时文件，复制完成后再改名为最终文件名，
+    输出目录中因此不会出现写了一半的片段。HLS/DASH打包输出是一个目录，按同样的方式整体发布，
+    已存在的同名目录在新目录就位后才会被删除
+    """
+    os.makedirs(os.path.dirname(final_path), exist_ok=True)
+    try:
+        _move_into_place(staged_path, final_path)
+        return
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+
+    partial_path = _partial_path(final_path)
+    try:
+        _remove_path(partial_path)
+        if os.path.isdir(staged_path):
+            shutil.copytree(staged_path, partial_path)
+        else:
+            shutil.copyfile(staged_path, partial_path)
+        _move_into_place(partial_path, final_path)
+    except BaseException:
+        _remove_path(partial_path)
+        raise
+    _remove_path(staged_path)
+
+class SegmentPublisher:
+    """
+    后台发布器：在单独的线程中依次发布已完成的片段，与下一个片段的编码同时进行
+    """
+
+    def __init__(self, log=print):
+        self.log = log
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._futures = []
+
+    def publish(self, staged_path, final_path, companions=()):
+        """
+        发布一个片段；companions 为随片段一起发布的附属文件 [(暂存路径, 最终路径)]，例如字幕切片，
+        在片段发布成功后发布，不单独计入结果
+        """
+        future = self._executor.submit(self._publish, staged_path, final_path, companions)
+        self._futures.append((final_path, future))
+        return future
+
+    def _publish(self, staged_path, final_path, companions):
+        try:
+            publish_file(staged_path, final_path)
+        except Exception as e:
+            self.log(f"发布 {os.path.basename(final_path)} 时出错: {e}")
+            raise
+        self.log(f"已发布: {final_path}")
+        for companion_staged, companion_final in companions:
+            try:
+                publish_file(companion_staged, companion_final)
+            except Exception as e:
+                self.log(f"发布 {os.path.basename(companion_final)} 时出错: {e}")
+                continue
+            self.log(f"已发布: {companion_final}")
+
+    def wait(self):
+        """
+        等待所有发布完成，返回 [(最终路径, 是否成功)]
+        """
+        results = []
+        for final_path, future in self._futures:
+            results.append((final_path, future.exception() is None))
+        self._executor.shutdown()
+        return results
+
+def estimate_output_bytes(video_path, plan, audio_format=None, profile=None):
+    """
+    估算全部片段的输出大小（字节），无法估算时返回None
+
+    仅音频模式按所选音频格式的码率估算；指定的编码配置在本机校准过时按校准测得的码率估算；
+    否则按源视频的平均码率估算
+    """
+    if audio_format:
+        bytes_per_second = AUDIO_FORMATS[audio_format]['bitrate'] * 1000 / 8
+        return int(bytes_per_second * plan.total_duration * SIZE_MARGIN)
+    if profile:
+        encoded = estimate_encoded_bytes(profile, plan.total_duration)
+        if encoded is not None:
+            return int(encoded * SIZE_MARGIN)
+    if not plan.source_duration:
+        return None
+    bytes_per_second = source_size(video_path) / plan.source_duration
+    return int(bytes_per_second * plan.total_duration * SIZE_MARGIN)
+
+def preflight_disk_space(video_path, plan, output_dir, scratch_dir, audio_format=None, profile=None):
+    """
+    开始处理前检查暂存目录和输出目录的剩余空间，输出大小的估算方式见estimate_output_bytes
+
+    返回 (估算的输出大小, 问题列表)，问题列表为空表示空间足够；
+    暂存目录与输出目录位于同一磁盘时只计算一次
+    """
+    estimate = estimate_output_bytes(video_path, plan, audio_format, profile)
+    if estimate is None:
+        return None, []
+
+    # 最坏情况下发布速度跟不上编码，全部片段会同时留在暂存目录中
+    needs = {}
+    for path in (scratch_dir, output_dir):
+        device = os.stat(path).st_dev
+        needs.setdefault(device, path)
+
+    problems = []
+    for path in needs.values():
+        free = shutil.disk_usage(path).free
+        if free < estimate + RESERVE_BYTES:
+            problems.append(f"{path} 剩余空间 {free / 1024 ** 3:.1f} GB，"
+                            f"预计需要 {(estimate + RESERVE_BYTES) / 1024 ** 3:.1f} GB")
+    return estimate, problems
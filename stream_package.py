@@ -0,0 +1,130 @@
+import os
+from encode_profiles import DEFAULT_PROFILE, get_profile
+from segment_command import NOISE_REDUCTION_FILTER
+
+# 自适应码率阶梯，从高到低；高于源视频分辨率的档位会被跳过，避免放大
+STREAM_LADDER = [
+    {'name': '720p', 'height': 720, 'video_bitrate': '2800k', 'maxrate': '3000k', 'bufsize': '4200k'},
+    {'name': '480p', 'height': 480, 'video_bitrate': '1400k', 'maxrate': '1500k', 'bufsize': '2100k'},
+    {'name': '360p', 'height': 360, 'video_bitrate': '800k', 'maxrate': '856k', 'bufsize': '1200k'},
+]
+
+# 所有档位共用一路音频
+STREAM_AUDIO_BITRATE = '128k'
+
+# 媒体分片时长（秒），各档位在相同时间点强制插入关键帧，保证切换码率时分片对齐
+STREAM_SEGMENT_SECONDS = 6
+
+# hls: 只输出HLS（TS分片）；dash: 输出DASH，并用同一组fMP4分片同时生成HLS播放列表
+STREAM_FORMATS = ('hls', 'dash')
+
+def ladder_for(source_height):
+    """
+    按源视频高度选出要输出的档位；源视频低于最低档位时只输出源分辨率的一档
+    """
+    if not source_height:
+        return list(STREAM_LADDER)
+    rungs = [rung for rung in STREAM_LADDER if rung['height'] <= source_height]
+    if not rungs:
+        rungs = [dict(STREAM_LADDER[-1], name=f"{source_height}p", height=source_height)]
+    return rungs
+
+def stream_dir_for(output_path):
+    """
+    返回片段对应的流媒体输出目录，例如 output/1-xxx.mp4 -> output/1-xxx
+    """
+    return os.path.splitext(output_path)[0]
+
+def master_playlist_path(stream_dir, clip_name):
+    """
+    返回HLS主播放列表路径，两种打包格式都会生成
+    """
+    return os.path.join(stream_dir, f"{clip_name}.m3u8")
+
+def build_stream_command(video_path, start_sec, duration, stream_dir, clip_name, profile=DEFAULT_PROFILE,
+                         noise_reduction=True, stream_format='hls', source_height=None, has_audio=True):
+    """
+    构建在一次编码中把片段打包为HLS/DASH多码率输出的FFmpeg命令
+
+    参数:
+        video_path: 源视频路径
+        start_sec: 片段开始时间（秒）
+        duration: 片段时长（秒）
+        stream_dir: 片段的输出目录，播放列表和分片都写在其中
+        clip_name: 片段名称，用于命名播放列表和分片
+        profile: 编码配置名称，只使用其中的编码器和预设，码率由码率阶梯决定
+        noise_reduction: 是否应用噪音降低处理
+        stream_format: 'hls' 或 'dash'，见STREAM_FORMATS
+        source_height: 源视频高度，用于跳过高于源分辨率的档位
+        has_audio: 源视频是否包含音频流
+    """
+    if stream_format not in STREAM_FORMATS:
+        raise ValueError(f"未知的打包格式: {stream_format}")
+    os.makedirs(stream_dir, exist_ok=True)
+    settings = get_profile(profile)
+    rungs = ladder_for(source_height)
+
+    cmd = [
+        'ffmpeg',
+        '-ss', f"{start_sec:.3f}",
+        '-t', f"{duration:.3f}",
+        '-i', video_path,
+    ]
+
+    # 解码一次，拆分后分别缩放到各档位的分辨率
+    graph = ['[0:v]split={}{}'.format(len(rungs), ''.join(f"[v{i}]" for i in range(len(rungs))))]
+    graph += [f"[v{i}]scale=-2:{rung['height']}[v{i}out]" for i, rung in enumerate(rungs)]
+    if has_audio and noise_reduction:
+        graph.append(f"[0:a:0]{NOISE_REDUCTION_FILTER}[aout]")
+    cmd.extend(['-filter_complex', ';'.join(graph)])
+
+    for i in range(len(rungs)):
+        cmd.extend(['-map', f"[v{i}out]"])
+    if has_audio:
+        cmd.extend(['-map', '[aout]' if noise_reduction else '0:a:0'])
+
+    cmd.extend(['-c:v', settings['video_codec'], '-preset', settings['preset']])
+    for i, rung in enumerate(rungs):
+        cmd.extend([
+            f"-b:v:{i}", rung['video_bitrate'],
+            f"-maxrate:v:{i}", rung['maxrate'],
+            f"-bufsize:v:{i}", rung['bufsize'],
+        ])
+    cmd.extend(['-force_key_frames', f"expr:gte(t,n_forced*{STREAM_SEGMENT_SECONDS})"])
+    if has_audio:
+        cmd.extend(['-c:a', 'aac', '-b:a', STREAM_AUDIO_BITRATE])
+
+    # 片段名称会出现在文件名模板中，转义模板占位符
+    hls_name = clip_name.replace('%', '%%')
+    if stream_format == 'hls':
+        # 每个档位一个变体播放列表，音频单独作为一组，所有变体共用
+        variants = [f"v:{i},name:{rung['name']}" + (",agroup:audio" if has_audio else '')
+                    for i, rung in enumerate(rungs)]
+        if has_audio:
+            variants.insert(0, "a:0,name:audio,agroup:audio")
+        cmd.extend([
+            '-f', 'hls',
+            '-hls_time', str(STREAM_SEGMENT_SECONDS),
+            '-hls_playlist_type', 'vod',
+            '-hls_flags', 'independent_segments',
+            '-hls_segment_filename', os.path.join(stream_dir, f"{hls_name}_%v_%03d.ts"),
+            '-master_pl_name', f"{clip_name}.m3u8",
+            '-var_stream_map', ' '.join(variants),
+            '-y', os.path.join(stream_dir, f"{hls_name}_%v.m3u8"),
+        ])
+    else:
+        dash_name = clip_name.replace('$', '$$')
+        adaptation_sets = 'id=0,streams=v' + (' id=1,streams=a' if has_audio else '')
+        cmd.extend([
+            '-f', 'dash',
+            '-seg_duration', str(STREAM_SEGMENT_SECONDS),
+            '-use_template', '1',
+            '-use_timeline', '1',
+            '-adaptation_sets', adaptation_sets,
+            '-init_seg_name', f"{dash_name}_init_$RepresentationID$.$ext$",
+            '-media_seg_name', f"{dash_name}_$RepresentationID$_$Number%05d$.$ext$",
+            '-hls_playlist', '1',
+            '-hls_master_name', f"{clip_name}.m3u8",
+            '-y', os.path.join(stream_dir, f"{clip_name}.mpd"),
+        ])
+    return cmd
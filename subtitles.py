@@ -0,0 +1,84 @@
+import os
+import re
+from cut_points import time_to_seconds, format_srt_time
+
+# SRT时间行，例如 00:01:02,500 --> 00:01:05,000
+SRT_TIME_RE = re.compile(r'^\s*([\d:,\.]+)\s*-->\s*([\d:,\.]+)')
+
+# 片段开头或结尾只剩很短一截的字幕不再保留
+MIN_CUE_SECONDS = 0.2
+
+SIDECAR_EXTENSIONS = ('.srt', '.zh.srt', '.chs.srt')
+
+def find_sidecar_subtitle(video_path):
+    """
+    查找与视频同名的SRT字幕文件，例如 test.mp4 -> test.srt，找不到时返回None
+    """
+    base = os.path.splitext(video_path)[0]
+    for ext in SIDECAR_EXTENSIONS:
+        if os.path.exists(base + ext):
+            return base + ext
+    return None
+
+def read_srt(srt_path):
+    """
+    读取SRT字幕文件，返回 [(开始秒数, 结束秒数, 文本)]，按开始时间排序
+
+    编码处理与切割点文件一致：优先UTF-8（允许BOM），失败时尝试GBK；
+    时间格式无效的字幕条目会被跳过
+    """
+    try:
+        with open(srt_path, 'r', encoding='utf-8-sig') as f:
+            content = f.read()
+    except UnicodeDecodeError:
+        with open(srt_path, 'r', encoding='gbk') as f:
+            content = f.read()
+
+    cues = []
+    for block in re.split(r'\n\s*\n', content.replace('\r\n', '\n').strip()):
+        lines = block.split('\n')
+        # 序号行可有可无，找到时间行后其余行即为字幕文本
+        for n, line in enumerate(lines[:2]):
+            match = SRT_TIME_RE.match(line)
+            if match:
+                break
+        else:
+            continue
+        try:
+            start = time_to_seconds(match.group(1))
+            end = time_to_seconds(match.group(2))
+        except ValueError:
+            continue
+        text = '\n'.join(lines[n + 1:]).strip()
+        if text and end > start:
+            cues.append((start, end, text))
+    cues.sort(key=lambda cue: cue[0])
+    return cues
+
+def slice_cues(cues, start, end):
+    """
+    取出与 [start, end] 重叠的字幕，截断到片段范围内并平移到从0开始
+    """
+    sliced = []
+    for cue_start, cue_end, text in cues:
+        if cue_end <= start or cue_start >= end:
+            continue
+        new_start = max(cue_start, start) - start
+        new_end = min(cue_end, end) - start
+        if new_end - new_start >= MIN_CUE_SECONDS:
+            sliced.append((new_start, new_end, text))
+    return sliced
+
+def write_srt(cues, output_path):
+    """
+    把字幕写入SRT文件，序号从1重新编号
+    """
+    with open(output_path, 'w', encoding='utf-8') as f:
+        for n, (start, end, text) in enumerate(cues, 1):
+            f.write(f"{n}\n{format_srt_time(start)} --> {format_srt_time(end)}\n{text}\n\n")
+
+def subtitle_path_for(output_path):
+    """
+    返回片段对应的字幕文件路径，例如 output/1-xxx.mp4 -> output/1-xxx.srt
+    """
+    return os.path.splitext(output_path)[0] + '.srt'
@@ -0,0 +1,53 @@
+import pytest
+from cut_analysis import suggest_cut_points
+
+
+def lengths(cuts, duration):
+    bounds = [0.0] + cuts + [duration]
+    return [end - start for start, end in zip(bounds, bounds[1:])]
+
+
+def analysis(duration, silences=(), scenes=()):
+    return {'duration': duration, 'silences': list(silences), 'scenes': list(scenes)}
+
+
+def test_cuts_at_silence_midpoint():
+    cuts = suggest_cut_points(analysis(300, silences=[(99, 101), (199, 201)]))
+    assert cuts == [100, 200]
+
+
+def test_snaps_to_nearby_scene_change():
+    cuts = suggest_cut_points(analysis(300, silences=[(99, 101)], scenes=[102.5, 150]))
+    assert cuts == [102.5]
+
+
+def test_skips_silences_that_make_short_segments():
+    cuts = suggest_cut_points(analysis(300, silences=[(20, 22), (149, 151), (270, 272)]))
+    assert cuts == [150]
+
+
+@pytest.mark.parametrize('duration', [950, 1810, 1801, 2700.5, 5000])
+def test_forced_cuts_respect_min_length(duration):
+    cuts = suggest_cut_points(analysis(duration), min_length=60, max_length=900)
+    parts = lengths(cuts, duration)
+    assert all(60 <= part <= 900 for part in parts), parts
+
+
+def test_forced_cuts_split_evenly():
+    assert suggest_cut_points(analysis(950)) == [475]
+    assert suggest_cut_points(analysis(1800)) == [900]
+    assert suggest_cut_points(analysis(3000)) == pytest.approx([750, 1500, 2250])
+
+
+def test_scene_fallback_leaves_room_for_tail():
+    # 895秒处的场景变化会只剩55秒，应改用400秒处的场景变化
+    cuts = suggest_cut_points(analysis(950, scenes=[400, 895]))
+    assert cuts == [400]
+
+
+def test_long_gap_between_silences():
+    cuts = suggest_cut_points(analysis(2000, silences=[(1899, 1901)], scenes=[700]))
+    parts = lengths(cuts, 2000)
+    assert cuts[0] == 700
+    assert 1900 in cuts
+    assert all(60 <= part <= 900 for part in parts), parts
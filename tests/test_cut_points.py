@@ -0,0 +1,133 @@
+import pytest
+from cut_points import time_to_seconds, format_cut_line, parse_cut_points, load_cut_plan
+
+
+@pytest.mark.parametrize('time_str, expected', [
+    ('00:01:02,500', 62.5),
+    ('00:01:02.500', 62.5),
+    ('01:00:00,000', 3600.0),
+    ('01:30', 90.0),
+    ('45', 45.0),
+    ('7.25', 7.25),
+])
+def test_time_to_seconds(time_str, expected):
+    assert time_to_seconds(time_str) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize('time_str', ['', '1:2:3:4', '00::10', '00:60', '00:60:00', 'ab:cd', '00:01:xx'])
+def test_time_to_seconds_rejects_invalid(time_str):
+    with pytest.raises(ValueError):
+        time_to_seconds(time_str)
+
+
+def test_parse_valid_lines():
+    plan = parse_cut_points([
+        '1、00:00:00,000~00:00:10,000，开场\n',
+        '\n',
+        '00:00:10,000~00:00:25,500，旧格式\n',
+    ])
+    assert plan.ok
+    assert not plan.warnings
+    assert [(s.index, s.start, s.end, s.name) for s in plan] == [
+        (1, 0.0, 10.0, '开场'),
+        (3, 10.0, 25.5, '旧格式'),
+    ]
+    assert plan.segments[1].output_filename == '3-旧格式.mp4'
+    assert plan.total_duration == pytest.approx(25.5)
+
+
+def test_malformed_lines_report_line_numbers():
+    plan = parse_cut_points([
+        '1、00:00:00,000~00:00:10,000，正常',
+        '这一行不是切割点',
+        '3、00:00:10,000-00:00:20,000，分隔符错误',
+        '4、00:00:99,000~00:01:10,000，秒数超过59',
+        '',
+        '6、00:00:20,000~00:00:30,000',
+    ])
+    assert not plan.ok
+    assert len(plan) == 1
+    assert [error.split(':', 1)[0] for error in plan.errors] == ['第2行', '第3行', '第4行', '第6行']
+
+
+def test_inverted_and_zero_length_ranges_are_errors():
+    plan = parse_cut_points([
+        '1、00:00:20,000~00:00:10,000，倒序',
+        '2、00:00:10,000~00:00:10,000，零长度',
+    ])
+    assert len(plan) == 0
+    assert len(plan.errors) == 2
+    assert plan.errors[0].startswith('第1行')
+    assert plan.errors[1].startswith('第2行')
+
+
+def test_clamps_to_source_duration():
+    plan = parse_cut_points([
+        '1、00:00:50,000~00:01:30,000，超出结尾',
+        '2、00:01:00,000~00:01:10,000，起点超出',
+        '3、00:00:00,000~00:00:30,000，正常',
+    ], source_duration=60.0)
+    assert [s.index for s in plan] == [1, 3]
+    assert plan.segments[0].end == 60.0
+    assert plan.segments[0].duration == pytest.approx(10.0)
+    assert len(plan.errors) == 1 and plan.errors[0].startswith('第2行')
+    assert len(plan.warnings) == 1 and plan.warnings[0].startswith('第1行')
+
+
+def test_overlaps_and_duplicates_are_warnings():
+    plan = parse_cut_points([
+        '1、00:00:00,000~00:01:00,000，完整',
+        '2、00:00:30,000~00:01:30,000，重叠',
+        '3、00:00:00,000~00:01:00,000，重复',
+        '4、00:01:30,000~00:02:00,000，相接',
+    ])
+    assert plan.ok
+    assert len(plan) == 4
+    assert sorted(plan.warnings) == sorted([
+        '第2行: 与第1行的时间段重叠',
+        '第3行: 与第1行的时间段重复',
+    ])
+
+
+def test_overlap_with_earlier_long_segment():
+    # 第3行与第2行不重叠，但落在第1行的范围内
+    plan = parse_cut_points([
+        '1、00:00:00,000~00:10:00,000，长片段',
+        '2、00:01:00,000~00:02:00,000，中间一',
+        '3、00:03:00,000~00:04:00,000，中间二',
+    ])
+    assert plan.warnings == [
+        '第2行: 与第1行的时间段重叠',
+        '第3行: 与第1行的时间段重叠',
+    ]
+
+
+def test_in_read_order_sorts_by_start():
+    plan = parse_cut_points([
+        '1、00:02:00,000~00:03:00,000，后',
+        '2、00:00:00,000~00:01:00,000，前',
+    ])
+    assert [s.index for s in plan.in_read_order()] == [2, 1]
+
+
+def test_large_plan():
+    count = 20000
+    lines = [format_cut_line(n + 1, n * 2.0, n * 2.0 + 1.5, f"片段{n + 1}") for n in range(count)]
+    lines.append(format_cut_line(count + 1, 10.0, 11.5, '重复'))
+    lines[9999] = '损坏的一行'
+    plan = parse_cut_points(lines, source_duration=count * 2.0 - 1.0)
+    assert len(plan) == count
+    assert plan.errors == ['第10000行: 无法解析切割点格式: 损坏的一行']
+    assert plan.warnings == [
+        f'第{count}行: 结束时间 11:06:39,500 超出视频时长，已截断到 11:06:39,000',
+        f'第{count + 1}行: 与第6行的时间段重复',
+    ]
+    assert plan.segments[-2].end == count * 2.0 - 1.0
+
+
+def test_load_cut_plan_gbk(tmp_path):
+    path = tmp_path / 'cuts.txt'
+    path.write_bytes('1、00:00:00,000~00:00:05,000，中文名称\n'.encode('gbk'))
+    plan = load_cut_plan(str(path))
+    assert plan.ok
+    assert plan.segments[0].name == '中文名称'
@@ -0,0 +1,155 @@
+import os
+import threading
+import functools
+import urllib.request
+import urllib.error
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+import pytest
+import http_source
+from http_source import BLOCK_SIZE, RangeFileHandler, resolve_source, source_size, transfer_stats
+
+FILE_SIZE = 12 * BLOCK_SIZE + 12345
+
+
+class QuietRangeHandler(RangeFileHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class QuietPlainHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(handler, directory):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), functools.partial(handler, directory=directory))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def stop_server(server):
+    server.shutdown()
+    server.server_close()
+
+
+def reset_proxy():
+    # 模拟新的进程：丢弃进程内的代理和上游连接，只保留磁盘缓存
+    if http_source._proxy is not None:
+        stop_server(http_source._proxy.server)
+    http_source._proxy = None
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    path = tmp_path / 'http_cache'
+    monkeypatch.setattr(http_source, 'HTTP_CACHE_DIR', str(path))
+    monkeypatch.setattr(http_source, '_proxy', None)
+    yield path
+    reset_proxy()
+
+
+@pytest.fixture
+def source_file(tmp_path):
+    directory = tmp_path / 'www'
+    directory.mkdir()
+    data = os.urandom(FILE_SIZE)
+    (directory / 'source.mp4').write_bytes(data)
+    return directory, data
+
+
+@pytest.fixture
+def range_url(source_file):
+    server = start_server(QuietRangeHandler, str(source_file[0]))
+    yield f"http://127.0.0.1:{server.server_address[1]}/source.mp4"
+    stop_server(server)
+
+
+def read_local(local_url, byte_range=None):
+    request = urllib.request.Request(local_url)
+    if byte_range:
+        request.add_header('Range', byte_range)
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return response.status, response.read()
+
+
+def test_reads_only_requested_range(cache_dir, source_file, range_url):
+    data = source_file[1]
+    local_url = resolve_source(range_url)
+    assert local_url.startswith('http://127.0.0.1:') and local_url.endswith('/source.mp4')
+    assert source_size(range_url) == FILE_SIZE
+
+    start, end = 5 * BLOCK_SIZE + 100, 5 * BLOCK_SIZE + 200000
+    status, body = read_local(local_url, f"bytes={start}-{end}")
+    assert status == 206
+    assert body == data[start:end + 1]
+
+    fetched, served, size = transfer_stats(range_url)
+    assert size == FILE_SIZE
+    assert served == end - start + 1
+    assert fetched == BLOCK_SIZE
+    assert fetched * 10 < size
+
+
+def test_suffix_range_and_full_read(cache_dir, source_file, range_url):
+    data = source_file[1]
+    local_url = resolve_source(range_url)
+    status, body = read_local(local_url, 'bytes=-1000')
+    assert status == 206 and body == data[-1000:]
+    status, body = read_local(local_url)
+    assert status == 200 and body == data
+
+
+def test_unsatisfiable_range(cache_dir, range_url):
+    local_url = resolve_source(range_url)
+    with pytest.raises(urllib.error.HTTPError) as e:
+        read_local(local_url, f"bytes={FILE_SIZE}-")
+    assert e.value.code == 416
+
+
+def test_warm_cache_downloads_nothing(cache_dir, source_file, range_url):
+    data = source_file[1]
+    start, end = 2 * BLOCK_SIZE, 4 * BLOCK_SIZE - 1
+    read_local(resolve_source(range_url), f"bytes={start}-{end}")
+    assert transfer_stats(range_url)[0] == 2 * BLOCK_SIZE
+
+    reset_proxy()
+    status, body = read_local(resolve_source(range_url), f"bytes={start}-{end}")
+    assert body == data[start:end + 1]
+    fetched, served, _ = transfer_stats(range_url)
+    assert fetched == 0
+    assert served == end - start + 1
+
+
+def test_changed_source_invalidates_cache(cache_dir, source_file, range_url):
+    directory, data = source_file
+    read_local(resolve_source(range_url), 'bytes=0-99')
+
+    reset_proxy()
+    new_data = os.urandom(FILE_SIZE + 1)
+    (directory / 'source.mp4').write_bytes(new_data)
+    status, body = read_local(resolve_source(range_url), 'bytes=0-99')
+    assert body == new_data[:100]
+    assert transfer_stats(range_url)[0] == BLOCK_SIZE
+
+
+def test_server_without_range_support(cache_dir, source_file):
+    server = start_server(QuietPlainHandler, str(source_file[0]))
+    url = f"http://127.0.0.1:{server.server_address[1]}/source.mp4"
+    try:
+        with pytest.raises(IOError, match='不支持范围请求'):
+            resolve_source(url)
+    finally:
+        stop_server(server)
+    assert not cache_dir.exists()
+
+
+def test_missing_file(cache_dir, range_url):
+    with pytest.raises(IOError, match='404'):
+        resolve_source(range_url.replace('source.mp4', 'missing.mp4'))
+
+
+def test_local_paths_are_unchanged(tmp_path):
+    path = str(tmp_path / 'local.mp4')
+    assert resolve_source(path) == path
+    assert transfer_stats(path) is None
@@ -0,0 +1,32 @@
+import pytest
+import media_probe
+from media_probe import video_rotation, probe_video_stream
+
+
+def fake_info(rotation=None, tags=None):
+    video = {'codec_type': 'video', 'width': 640, 'height': 360, 'avg_frame_rate': '25/1'}
+    if rotation is not None:
+        video['side_data_list'] = [{'side_data_type': 'Display Matrix', 'rotation': rotation}]
+    if tags:
+        video['tags'] = tags
+    return {'format': {'duration': '10.0'}, 'streams': [video, {'codec_type': 'audio'}]}
+
+
+@pytest.mark.parametrize('rotation, expected', [(None, 0), (90, 90), (-90, 270), (180, 180), (-180, 180), (270, 270)])
+def test_video_rotation_from_display_matrix(rotation, expected):
+    assert video_rotation(fake_info(rotation)['streams'][0]) == expected
+
+
+def test_video_rotation_from_legacy_tag():
+    assert video_rotation(fake_info(tags={'rotate': '90'})['streams'][0]) == 90
+    assert video_rotation(fake_info(tags={'rotate': 'bad'})['streams'][0]) == 0
+
+
+@pytest.mark.parametrize('rotation, size', [(None, (640, 360)), (90, (360, 640)), (-90, (360, 640)), (180, (640, 360))])
+def test_probe_video_stream_swaps_size_for_quarter_turns(monkeypatch, rotation, size):
+    # FFmpeg解码时自动旋转，写入端的画面尺寸必须与旋转后的画面一致
+    monkeypatch.setattr(media_probe, 'probe_media', lambda path: fake_info(rotation))
+    width, height, fps, has_audio = probe_video_stream('phone.mp4')
+    assert (width, height) == size
+    assert fps == 25.0
+    assert has_audio
@@ -0,0 +1,123 @@
+import os
+import errno
+import shutil
+import pytest
+import staging
+from staging import publish_file
+
+
+@pytest.fixture
+def dirs(tmp_path):
+    scratch = tmp_path / 'scratch'
+    output = tmp_path / 'output'
+    scratch.mkdir()
+    output.mkdir()
+    return scratch, output
+
+
+@pytest.fixture
+def cross_device(monkeypatch, dirs):
+    # 模拟暂存目录与输出目录位于不同磁盘：从暂存目录改名时失败
+    scratch = str(dirs[0])
+    real_replace, real_rename = os.replace, os.rename
+
+    def check(src):
+        if str(src).startswith(scratch):
+            raise OSError(errno.EXDEV, 'Invalid cross-device link')
+
+    def fake_replace(src, dst):
+        check(src)
+        real_replace(src, dst)
+
+    def fake_rename(src, dst):
+        check(src)
+        real_rename(src, dst)
+
+    monkeypatch.setattr(staging.os, 'replace', fake_replace)
+    monkeypatch.setattr(staging.os, 'rename', fake_rename)
+
+
+def make_package(path, content):
+    path.mkdir()
+    (path / 'clip.m3u8').write_text(content, encoding='utf-8')
+    (path / 'clip_000.ts').write_bytes(content.encode('utf-8'))
+
+
+def listing(directory):
+    return sorted(os.listdir(directory))
+
+
+def test_publish_file_replaces_existing(dirs):
+    scratch, output = dirs
+    (scratch / 'a.mp4').write_bytes(b'new')
+    (output / 'a.mp4').write_bytes(b'old')
+    publish_file(str(scratch / 'a.mp4'), str(output / 'a.mp4'))
+    assert (output / 'a.mp4').read_bytes() == b'new'
+    assert listing(scratch) == []
+
+
+def test_publish_directory_over_existing(dirs):
+    scratch, output = dirs
+    make_package(scratch / 'clip', 'new')
+    make_package(output / 'clip', 'old')
+    (output / 'clip' / 'stale.ts').write_bytes(b'x')
+    publish_file(str(scratch / 'clip'), str(output / 'clip'))
+    assert (output / 'clip' / 'clip.m3u8').read_text(encoding='utf-8') == 'new'
+    assert listing(output / 'clip') == ['clip.m3u8', 'clip_000.ts']
+    assert listing(output) == ['clip']
+
+
+def test_publish_file_cross_device(dirs, cross_device):
+    scratch, output = dirs
+    (scratch / 'a.mp4').write_bytes(b'new')
+    (output / 'a.mp4').write_bytes(b'old')
+    publish_file(str(scratch / 'a.mp4'), str(output / 'a.mp4'))
+    assert (output / 'a.mp4').read_bytes() == b'new'
+    assert listing(output) == ['a.mp4']
+    assert listing(scratch) == []
+
+
+def test_publish_directory_cross_device(dirs, cross_device):
+    scratch, output = dirs
+    make_package(scratch / 'clip', 'new')
+    make_package(output / 'clip', 'old')
+    publish_file(str(scratch / 'clip'), str(output / 'clip'))
+    assert (output / 'clip' / 'clip.m3u8').read_text(encoding='utf-8') == 'new'
+    assert listing(output) == ['clip']
+    assert listing(scratch) == []
+
+
+def test_failed_copy_keeps_old_directory(dirs, cross_device, monkeypatch):
+    scratch, output = dirs
+    make_package(scratch / 'clip', 'new')
+    make_package(output / 'clip', 'old')
+    real_copytree = shutil.copytree
+
+    def failing_copytree(src, dst, **kwargs):
+        real_copytree(src, dst, **kwargs)
+        raise OSError(errno.ENOSPC, 'No space left on device')
+
+    monkeypatch.setattr(staging.shutil, 'copytree', failing_copytree)
+    with pytest.raises(OSError):
+        publish_file(str(scratch / 'clip'), str(output / 'clip'))
+    # 复制失败时旧版本保持原样，临时目录已清理
+    assert (output / 'clip' / 'clip.m3u8').read_text(encoding='utf-8') == 'old'
+    assert listing(output) == ['clip']
+
+
+def test_failed_swap_restores_old_directory(dirs, monkeypatch):
+    scratch, output = dirs
+    make_package(scratch / 'clip', 'new')
+    make_package(output / 'clip', 'old')
+    real_rename = os.rename
+
+    def failing_rename(src, dst):
+        if str(src).startswith(str(scratch)):
+            raise OSError(errno.EACCES, 'Permission denied')
+        real_rename(src, dst)
+
+    monkeypatch.setattr(staging.os, 'rename', failing_rename)
+    with pytest.raises(OSError):
+        publish_file(str(scratch / 'clip'), str(output / 'clip'))
+    assert (output / 'clip' / 'clip.m3u8').read_text(encoding='utf-8') == 'old'
+    assert listing(output) == ['clip']
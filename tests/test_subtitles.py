@@ -0,0 +1,96 @@
+import pytest
+from subtitles import MIN_CUE_SECONDS, read_srt, slice_cues, write_srt, find_sidecar_subtitle, subtitle_path_for
+
+SAMPLE_SRT = (
+    '1\n'
+    '00:00:01,000 --> 00:00:03,500\n'
+    '第一句\n'
+    '\n'
+    '2\n'
+    '00:00:04,000 --> 00:00:06,000\n'
+    '第二句\n'
+    '两行文本\n'
+)
+
+
+def test_read_srt(tmp_path):
+    path = tmp_path / 'a.srt'
+    path.write_text(SAMPLE_SRT, encoding='utf-8')
+    assert read_srt(str(path)) == [(1.0, 3.5, '第一句'), (4.0, 6.0, '第二句\n两行文本')]
+
+
+def test_read_srt_without_index_lines(tmp_path):
+    path = tmp_path / 'a.srt'
+    path.write_text('00:00:01,000 --> 00:00:02,000\n无序号\n\n'
+                    '2\n00:00:03,000 --> 00:00:04,000\n有序号\n', encoding='utf-8')
+    assert read_srt(str(path)) == [(1.0, 2.0, '无序号'), (3.0, 4.0, '有序号')]
+
+
+def test_read_srt_crlf_and_bom(tmp_path):
+    path = tmp_path / 'a.srt'
+    path.write_bytes(b'\xef\xbb\xbf' + SAMPLE_SRT.replace('\n', '\r\n').encode('utf-8'))
+    assert read_srt(str(path)) == [(1.0, 3.5, '第一句'), (4.0, 6.0, '第二句\n两行文本')]
+
+
+def test_read_srt_gbk(tmp_path):
+    path = tmp_path / 'a.srt'
+    path.write_bytes(SAMPLE_SRT.encode('gbk'))
+    assert [text for _, _, text in read_srt(str(path))] == ['第一句', '第二句\n两行文本']
+
+
+def test_read_srt_skips_invalid_and_sorts(tmp_path):
+    path = tmp_path / 'a.srt'
+    path.write_text('1\n00:00:05,000 --> 00:00:06,000\n后\n\n'
+                    '2\n00:00:99,000 --> 00:01:00,000\n时间无效\n\n'
+                    '3\n00:00:03,000 --> 00:00:02,000\n倒序\n\n'
+                    '4\n00:00:01,000 --> 00:00:02,000\n\n\n'
+                    '5\n00:00:01,000 --> 00:00:02,000\n前\n', encoding='utf-8')
+    assert read_srt(str(path)) == [(1.0, 2.0, '前'), (5.0, 6.0, '后')]
+
+
+def test_read_srt_undecodable(tmp_path):
+    path = tmp_path / 'a.srt'
+    path.write_bytes(b'1\n00:00:01,000 --> 00:00:02,000\n\x81\xff\n')
+    with pytest.raises(ValueError):
+        read_srt(str(path))
+
+
+def test_slice_shifts_to_segment_start():
+    cues = [(1.0, 2.0, '前'), (10.0, 12.0, '中'), (30.0, 31.0, '后')]
+    assert slice_cues(cues, 5.0, 20.0) == [(5.0, 7.0, '中')]
+
+
+def test_slice_clamps_cues_crossing_boundaries():
+    cues = [(4.0, 6.0, '跨开头'), (18.0, 22.0, '跨结尾'), (2.0, 25.0, '覆盖整段')]
+    assert slice_cues(cues, 5.0, 20.0) == [(0.0, 1.0, '跨开头'), (13.0, 15.0, '跨结尾'), (0.0, 15.0, '覆盖整段')]
+
+
+def test_slice_drops_short_remainders():
+    short = MIN_CUE_SECONDS / 2
+    cues = [(5.0 - 1.0, 5.0 + short, '开头只剩一点'), (20.0 - short, 21.0, '结尾只剩一点'),
+            (10.0, 11.0, '完整')]
+    assert slice_cues(cues, 5.0, 20.0) == [(5.0, 6.0, '完整')]
+
+
+def test_slice_excludes_touching_cues():
+    cues = [(3.0, 5.0, '在开头之前结束'), (20.0, 22.0, '在结尾之后开始')]
+    assert slice_cues(cues, 5.0, 20.0) == []
+
+
+def test_write_srt_renumbers(tmp_path):
+    cues = slice_cues([(1.0, 2.0, '不在片段中'), (6.0, 7.25, '一'), (8.0, 9.0, '二\n第二行')], 5.0, 20.0)
+    path = tmp_path / 'out.srt'
+    write_srt(cues, str(path))
+    assert path.read_text(encoding='utf-8') == (
+        '1\n00:00:01,000 --> 00:00:02,250\n一\n\n'
+        '2\n00:00:03,000 --> 00:00:04,000\n二\n第二行\n\n'
+    )
+    assert read_srt(str(path)) == [(1.0, 2.25, '一'), (3.0, 4.0, '二\n第二行')]
+
+
+def test_sidecar_and_output_paths(tmp_path):
+    video = tmp_path / 'test.mp4'
+    assert find_sidecar_subtitle(str(video)) is None
+    (tmp_path / 'test.zh.srt').write_text('', encoding='utf-8')
+    assert find_sidecar_subtitle(str(video)) == str(tmp_path / 'test.zh.srt')
+    assert subtitle_path_for('output/1-片段.mp4') == 'output/1-片段.srt'
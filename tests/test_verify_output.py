@@ -0,0 +1,58 @@
+import pytest
+import verify_output
+from verify_output import DURATION_TOLERANCE, verify_package, verify_segment
+
+
+def write_package(directory, durations, endlist=True):
+    (directory / 'clip.m3u8').write_text(
+        '#EXTM3U\n#EXT-X-STREAM-INF:BANDWIDTH=800000,CODECS="avc1.64001e,mp4a.40.2"\nclip_0.m3u8\n',
+        encoding='utf-8')
+    lines = ['#EXTM3U', '#EXT-X-PLAYLIST-TYPE:VOD']
+    for n, duration in enumerate(durations):
+        lines += [f'#EXTINF:{duration:.6f},', f'clip_0_{n:03d}.ts']
+        (directory / f'clip_0_{n:03d}.ts').write_bytes(b'\x47' * 188)
+    if endlist:
+        lines.append('#EXT-X-ENDLIST')
+    (directory / 'clip_0.m3u8').write_text('\n'.join(lines) + '\n', encoding='utf-8')
+
+
+def test_package_passes(tmp_path):
+    write_package(tmp_path, [6.0] * 10)
+    assert verify_package(str(tmp_path), str(tmp_path / 'clip.m3u8'), 60.0) == []
+
+
+def test_package_truncated_long_segment_fails(tmp_path):
+    # 90分钟的片段少了最后一个分片（6秒），不能因为片段较长而放过
+    write_package(tmp_path, [6.0] * 899)
+    problems = verify_package(str(tmp_path), str(tmp_path / 'clip.m3u8'), 5400.0)
+    assert len(problems) == 1 and '时长' in problems[0]
+
+
+def test_package_requires_expected_master(tmp_path):
+    write_package(tmp_path, [6.0] * 10)
+    assert verify_package(str(tmp_path), str(tmp_path / 'other.m3u8'), 60.0) == ['缺少HLS主播放列表 other.m3u8']
+    # 变体播放列表不能当作主播放列表
+    problems = verify_package(str(tmp_path), str(tmp_path / 'clip_0.m3u8'), 60.0)
+    assert problems == ['clip_0.m3u8 不是HLS主播放列表']
+
+
+def test_package_missing_endlist_and_segment(tmp_path):
+    write_package(tmp_path, [6.0] * 3, endlist=False)
+    (tmp_path / 'clip_0_001.ts').unlink()
+    problems = verify_package(str(tmp_path), str(tmp_path / 'clip.m3u8'), 18.0)
+    assert any('EXT-X-ENDLIST' in p for p in problems)
+    assert any('clip_0_001.ts' in p for p in problems)
+
+
+@pytest.mark.parametrize('expected, actual, ok', [
+    (5400.0, 5400.0 - DURATION_TOLERANCE / 2, True),
+    (5400.0, 5400.0 - 6.0, False),
+    (3600.0, 3600.0 - 36.0, False),
+    (10.0, 10.4, True),
+    (10.0, 10.6, False),
+])
+def test_segment_duration_tolerance_does_not_scale(monkeypatch, expected, actual, ok):
+    info = {'format': {'duration': str(actual)}, 'streams': [{'codec_type': 'audio'}]}
+    monkeypatch.setattr(verify_output, 'probe_media', lambda path: info)
+    problems = verify_segment('clip.m4a', expected, expect_audio=True, expect_video=False)
+    assert (problems == []) == ok
@@ -0,0 +1,187 @@
+import os
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from media_probe import probe_media, media_duration, stream_types, probe_first_video_frame
+
+# 输出时长与要求时长允许的偏差（秒）：只需容纳帧边界取整和音频编码器的首尾填充，
+# 与片段长度无关，长片段缺少的内容同样能被发现
+DURATION_TOLERANCE = 0.5
+
+# 第一帧的显示时间不应晚于该值（秒），否则片段开头会出现空白或卡顿
+FIRST_FRAME_MAX_TIME = 0.1
+
+# 抽样解码时在片段中均匀选取的位置数
+SAMPLE_POINTS = 3
+
+# 校验只读取元数据，开销很小，线程数不需要太多
+VERIFY_WORKERS = 2
+
+def verify_segment(path, expected_duration, expect_audio=True, sample_decode=False, expect_video=True):
+    """
+    校验单个输出片段，不做完整解码
+
+    参数:
+        path: 输出文件路径
+        expected_duration: 要求的片段时长（秒）
+        expect_audio: 是否要求包含音频流（源视频有音频时为True）
+        sample_decode: 是否额外在几个位置抽样解码一帧
+        expect_video: 是否要求包含视频流，仅音频模式下为False
+
+    返回问题列表，为空表示校验通过
+    """
+    info = probe_media(path)
+    if not info:
+        return ["无法读取文件信息，文件可能已损坏"]
+
+    problems = []
+    duration = media_duration(info)
+    if duration is None:
+        problems.append("无法读取时长")
+    elif abs(duration - expected_duration) > DURATION_TOLERANCE:
+        problems.append(f"时长为 {duration:.3f} 秒，要求 {expected_duration:.3f} 秒")
+
+    types = stream_types(info)
+    if expect_video and 'video' not in types:
+        problems.append("缺少视频流")
+    if expect_audio and 'audio' not in types:
+        problems.append("缺少音频流")
+
+    if 'video' in types:
+        first_frame = probe_first_video_frame(path)
+        if first_frame is None:
+            problems.append("无法读取第一帧")
+        else:
+            key_frame, frame_time = first_frame
+            if not key_frame:
+                problems.append("第一帧不是关键帧")
+            if frame_time > FIRST_FRAME_MAX_TIME:
+                problems.append(f"第一帧的时间为 {frame_time:.3f} 秒，不是从0开始")
+
+    if sample_decode and not problems:
+        problems.extend(sample_decode_check(path, duration, 'v' if 'video' in types else 'a'))
+    return problems
+
+def _read_playlist(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip()]
+
+def _playlist_uris(lines):
+    """
+    返回播放列表中引用的全部URI：普通行以及EXT-X-MAP/EXT-X-MEDIA中的URI属性
+    """
+    uris = []
+    for line in lines:
+        if not line.startswith('#'):
+            uris.append(line)
+        elif 'URI="' in line:
+            uris.append(line.split('URI="', 1)[1].split('"', 1)[0])
+    return uris
+
+def verify_package(stream_dir, master_path, expected_duration, expect_audio=True):
+    """
+    校验HLS/DASH打包输出，只解析播放列表并检查引用的文件，不读取媒体数据
+
+    检查主播放列表（stream_package.master_playlist_path 的返回值）存在，主播放列表和每个变体播放列表完整
+    （有EXT-X-ENDLIST）、各变体的总时长与要求一致、引用的分片和初始化文件都存在且非空；
+    返回问题列表，为空表示校验通过
+    """
+    master_name = os.path.basename(master_path)
+    if not os.path.isfile(master_path):
+        return [f"缺少HLS主播放列表 {master_name}"]
+    master_lines = _read_playlist(master_path)
+    if not any(line.startswith('#EXT-X-STREAM-INF') for line in master_lines):
+        return [f"{master_name} 不是HLS主播放列表"]
+
+    master = _playlist_uris(master_lines)
+    problems = []
+    if expect_audio and not any('mp4a' in line or 'TYPE=AUDIO' in line for line in master_lines):
+        problems.append("缺少音频流")
+
+    for variant in dict.fromkeys(master):
+        variant_path = os.path.join(stream_dir, variant)
+        if not os.path.isfile(variant_path):
+            problems.append(f"缺少变体播放列表 {variant}")
+            continue
+        lines = _read_playlist(variant_path)
+        if '#EXT-X-ENDLIST' not in lines:
+            problems.append(f"{variant} 不完整（缺少EXT-X-ENDLIST）")
+        duration = sum(float(line[len('#EXTINF:'):].split(',', 1)[0])
+                       for line in lines if line.startswith('#EXTINF:'))
+        if abs(duration - expected_duration) > DURATION_TOLERANCE:
+            problems.append(f"{variant} 时长为 {duration:.3f} 秒，要求 {expected_duration:.3f} 秒")
+        for uri in _playlist_uris(lines):
+            segment_path = os.path.join(stream_dir, uri)
+            if not os.path.isfile(segment_path) or os.path.getsize(segment_path) == 0:
+                problems.append(f"{variant} 引用的 {uri} 不存在或为空")
+    return problems
+
+def sample_decode_check(path, duration, stream='v', points=SAMPLE_POINTS):
+    """
+    在片段中均匀选取几个位置，各解码一帧（stream为'a'时解码音频帧），返回问题列表
+    """
+    problems = []
+    for n in range(points):
+        position = duration * (n + 0.5) / points
+        cmd = [
+            'ffmpeg', '-v', 'error', '-xerror',
+            '-ss', f"{position:.3f}",
+            '-i', path,
+            '-map', f"0:{stream}:0", f"-frames:{stream}", '1',
+            '-f', 'null', '-'
+        ]
+        process = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                                 text=True, encoding='utf-8', errors='replace')
+        if process.returncode != 0 or process.stderr.strip():
+            detail = process.stderr.strip().splitlines()[-1:] or [f"退出码 {process.returncode}"]
+            problems.append(f"在 {position:.1f} 秒处解码失败: {detail[0]}")
+    return problems
+
+class SegmentVerifier:
+    """
+    后台校验器：在线程池中校验已编码的片段，与后续片段的编码同时进行；
+    校验通过的片段交给发布器发布，未通过的片段不会出现在输出目录中
+    """
+
+    def __init__(self, publisher, expect_audio=True, sample_decode=False, log=print, max_workers=VERIFY_WORKERS,
+                 expect_video=True):
+        self.publisher = publisher
+        self.expect_audio = expect_audio
+        self.expect_video = expect_video
+        self.sample_decode = sample_decode
+        self.log = log
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._futures = []
+
+    def submit(self, staged_path, final_path, expected_duration, companions=(), master_playlist=None):
+        """
+        提交一个片段；companions 为只有片段校验通过才发布的附属文件 [(暂存路径, 最终路径)]，
+        master_playlist 为HLS/DASH打包输出（暂存路径是目录）中应有的主播放列表路径
+        """
+        future = self._executor.submit(self._verify, staged_path, final_path, expected_duration, companions,
+                                       master_playlist)
+        self._futures.append((final_path, future))
+        return future
+
+    def _verify(self, staged_path, final_path, expected_duration, companions, master_playlist):
+        name = os.path.basename(final_path)
+        try:
+            if master_playlist:
+                problems = verify_package(staged_path, master_playlist, expected_duration, self.expect_audio)
+            else:
+                problems = verify_segment(staged_path, expected_duration, self.expect_audio, self.sample_decode,
+                                          self.expect_video)
+        except Exception as e:
+            problems = [f"校验时发生异常: {e}"]
+        if problems:
+            self.log(f"片段 {name} 校验未通过，未发布: " + "；".join(problems))
+            return problems
+        self.publisher.publish(staged_path, final_path, companions)
+        return problems
+
+    def wait(self):
+        """
+        等待所有校验完成，返回 [(最终路径, 问题列表)]；须在发布器的wait之前调用
+        """
+        results = [(final_path, future.result()) for final_path, future in self._futures]
+        self._executor.shutdown()
+        return results
@@ -1,196 +1,123 @@
 import os
 import sys
 import subprocess
-import re
-import time
-from datetime import timedelta
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                              QPushButton, QLabel, QFileDialog, QProgressBar, QTextEdit, 
-                             QCheckBox, QMessageBox, QFrame, QSplitter)
+                             QCheckBox, QComboBox, QMessageBox, QFrame, QSplitter, QInputDialog)
 from PyQt5.QtCore import Qt, QThread, pyqtSignal, QTimer
 from PyQt5.QtGui import QFont, QIcon
-
-# 复用原有的时间处理函数
-def time_to_seconds(time_str):
-    """
-    将时间字符串转换为秒数
-    支持格式：HH:MM:SS,mmm 或 HH:MM:SS.mmm 或 MM:SS 或 SS
-    """
-    # 替换逗号为点，以便统一处理
-    time_str = time_str.replace(',', '.')
-    
-    parts = time_str.split(':')
-    if len(parts) == 3:  # HH:MM:SS.mmm
-        return int(parts[0]) * 3600 + int(parts[1]) * 60 + float(parts[2])
-    elif len(parts) == 2:  # MM:SS
-        return int(parts[0]) * 60 + float(parts[1])
-    else:  # SS
-        return float(parts[0])
-
-def format_time(seconds):
-    """
-    将秒数转换为 HH:MM:SS.mmm 格式，适用于FFmpeg
-    """
-    hours = int(seconds // 3600)
-    minutes = int((seconds % 3600) // 60)
-    seconds = seconds % 60
-    return f"{hours:02d}:{minutes:02d}:{seconds:06.3f}"
-
-def format_duration(seconds):
-    """
-    将秒数格式化为人类可读的时间格式
-    """
-    return str(timedelta(seconds=int(seconds)))
+from encode_profiles import DEFAULT_PROFILE, ENCODE_PROFILES
+from ffmpeg_caps import get_ffmpeg_capabilities
+from segment_command import AUDIO_FORMATS
+from staging import DEFAULT_SCRATCH_DIR
+from subtitles import find_sidecar_subtitle
+from http_source import is_url
+from split_job import run_split_job
+from cut_analysis import analyze_video, suggest_cut_points, write_cut_points
 
 # 视频处理线程
 class VideoProcessThread(QThread):
     # 定义信号
-    progress_update = pyqtSignal(int, str)  # 进度更新信号 (片段索引, 状态消息)
-    process_finished = pyqtSignal(bool, str, str, int, int)  # 处理完成信号 (是否成功, 消息, 输出目录, 成功数, 总数)
+    segments_planned = pyqtSignal(int)  # 切割计划信号 (有效片段总数)
+    progress_update = pyqtSignal(int, str)  # 进度更新信号 (已完成片段数, 状态消息)
+    process_finished = pyqtSignal(bool, str, str, int, int, int)  # 处理完成信号 (是否成功, 消息, 输出目录, 成功数, 总数, 校验未通过数)
     log_message = pyqtSignal(str)  # 日志消息信号
     
-    def __init__(self, video_path, cut_points_path, output_dir, noise_reduction):
+    def __init__(self, video_path, cut_points_path, output_dir, noise_reduction, profile=DEFAULT_PROFILE, proxy=False,
+                 scratch_dir=DEFAULT_SCRATCH_DIR, sample_decode=False, stream_format=None, audio_format=None,
+                 subtitles_path=None):
         super().__init__()
         self.video_path = video_path
         self.cut_points_path = cut_points_path
         self.output_dir = output_dir
         self.noise_reduction = noise_reduction
+        self.profile = profile
+        self.proxy = proxy
+        self.scratch_dir = scratch_dir
+        self.sample_decode = sample_decode
+        self.stream_format = stream_format
+        self.audio_format = audio_format
+        self.subtitles_path = subtitles_path
         self.is_running = True
     
     def run(self):
-        # 记录开始时间
-        start_time = time.time()
-        
-        # 检查FFmpeg是否安装
+        result = run_split_job(self.video_path, self.cut_points_path, self.output_dir, self.noise_reduction,
+                               self.profile, self.proxy, self.scratch_dir, self.sample_decode, self.stream_format,
+                               self.audio_format, self.subtitles_path, log=self.log_message.emit,
+                               cancelled=lambda: not self.is_running, on_planned=self.segments_planned.emit,
+                               on_progress=self.progress_update.emit)
+        self.process_finished.emit(result.ok, result.message, result.output_dir, result.successful, result.total,
+                                   len(result.failed_verification))
+    
+    def stop(self):
+        self.is_running = False
+
+# 切割点分析线程
+class CutAnalysisThread(QThread):
+    analysis_finished = pyqtSignal(bool, str)  # 分析完成信号 (是否成功, 切割点文件路径或错误信息)
+    log_message = pyqtSignal(str)  # 日志消息信号
+    
+    def __init__(self, video_path, output_path):
+        super().__init__()
+        self.video_path = video_path
+        self.output_path = output_path
+    
+    def run(self):
         try:
-            subprocess.run(['ffmpeg', '-version'], stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
-        except (subprocess.SubprocessError, FileNotFoundError):
-            self.log_message.emit("错误: 未找到FFmpeg。请确保FFmpeg已安装并添加到系统PATH中。")
-            self.log_message.emit("您可以从 https://ffmpeg.org/download.html 下载FFmpeg。")
-            self.process_finished.emit(False, "FFmpeg未安装", "", 0, 0)
+            analysis = analyze_video(self.video_path, log=self.log_message.emit)
+            cuts = suggest_cut_points(analysis)
+            count = write_cut_points(cuts, analysis['duration'], self.output_path)
+        except Exception as e:
+            self.log_message.emit(f"自动生成切割点时出错: {e}")
+            self.analysis_finished.emit(False, str(e))
             return
-        
-        # 确保输出目录存在
-        if not os.path.exists(self.output_dir):
-            os.makedirs(self.output_dir)
-        
-        # 读取切割点文件
-        try:
-            with open(self.cut_points_path, 'r', encoding='utf-8') as f:
-                cut_points = f.readlines()
-        except UnicodeDecodeError:
-            # 尝试使用其他编码
-            try:
-                with open(self.cut_points_path, 'r', encoding='gbk') as f:
-                    cut_points = f.readlines()
-            except Exception as e:
-                self.log_message.emit(f"读取切割点文件时出错: {e}")
-                self.process_finished.emit(False, f"读取切割点文件时出错: {e}", "", 0, 0)
-                return
-        
-        self.log_message.emit(f"正在处理视频: {self.video_path}")
-        self.log_message.emit(f"共发现 {len(cut_points)} 个切割点")
-        
-        # 处理每个切割点
-        successful_clips = 0
-        total_valid_points = 0
-        
-        for i, point in enumerate(cut_points):
-            if not self.is_running:
-                self.log_message.emit("处理已取消")
-                self.process_finished.emit(False, "处理已取消", self.output_dir, successful_clips, total_valid_points)
-                return
-                
-            point = point.strip()
-            if not point:
-                continue
-            
-            # 修改正则表达式以匹配实际格式: 序号、开始时间~结束时间，视频名称
-            match = re.match(r'\d+、([\d:,\.]+)~([\d:,\.]+)，(.+)', point)
-            if match:
-                total_valid_points += 1
-                start_time_str, end_time_str, clip_name = match.groups()
-                
-                # 转换时间为秒
-                start_time_sec = time_to_seconds(start_time_str)
-                end_time_sec = time_to_seconds(end_time_str)
-                duration = end_time_sec - start_time_sec
-                
-                # 格式化时间为FFmpeg可接受的格式
-                start_time_fmt = format_time(start_time_sec)
-                duration_fmt = format_time(duration)
-                
-                self.log_message.emit(f"正在处理第{i+1}个片段: {start_time_str}~{end_time_str}，{clip_name}")
-                self.progress_update.emit(i, f"处理中: {clip_name}")
-                
-                # 设置输出文件名（添加序号前缀）
-                output_filename = f"{i+1}-{clip_name}.mp4"
-                output_path = os.path.join(self.output_dir, output_filename)
-                
-                # 使用FFmpeg切割视频
-                self.log_message.emit(f"正在保存: {output_path}")
-                
-                # 构建FFmpeg命令
-                cmd = [
-                    'ffmpeg',
-                    '-i', self.video_path,
-                    '-ss', start_time_fmt,
-                    '-t', duration_fmt,
-                    '-c:v', 'libx264',  # 视频编码器
-                    '-c:a', 'aac',      # 音频编码器
-                ]
-                
-                # 添加音频降噪处理
-                if self.noise_reduction:
-                    cmd.extend([
-                        '-af', 'highpass=f=200,lowpass=f=3000,afftdn=nf=-25',  # 音频滤镜：高通、低通和FFT降噪
-                    ])
-                
-                cmd.extend([
-                    '-b:a', '192k',     # 音频比特率
-                    '-avoid_negative_ts', '1',
-                    '-y',               # 覆盖已存在的文件
-                    output_path
-                ])
-                
+        self.log_message.emit(f"已生成 {count} 个切割点: {self.output_path}")
+        self.analysis_finished.emit(True, self.output_path)
+
+# 默认文件查找线程
+class FileDiscoveryThread(QThread):
+    files_found = pyqtSignal(str, str)  # 查找完成信号 (视频文件路径, 切割点文件路径)，未找到时为空字符串
+    log_message = pyqtSignal(str)  # 日志消息信号
+    
+    def __init__(self, video_dir, cut_points_file, output_dir):
+        super().__init__()
+        self.video_dir = video_dir
+        self.cut_points_file = cut_points_file
+        self.output_dir = output_dir
+    
+    def run(self):
+        # 确保默认目录存在
+        for path, name in ((self.video_dir, "视频"), (self.output_dir, "输出")):
+            if not os.path.exists(path):
                 try:
-                    # 执行FFmpeg命令
-                    process = subprocess.run(
-                        cmd, 
-                        stdout=subprocess.PIPE, 
-                        stderr=subprocess.PIPE,
-                        text=True,
-                        encoding='utf-8'
-                    )
-                    
-                    if process.returncode == 0:
-                        self.log_message.emit(f"片段 {i+1} 处理完成")
-                        successful_clips += 1
-                    else:
-                        self.log_message.emit(f"处理片段 {i+1} 时出错:")
-                        self.log_message.emit(process.stderr)
+                    os.makedirs(path)
                 except Exception as e:
-                    self.log_message.emit(f"处理片段 {i+1} 时发生异常: {e}")
-            else:
-                self.log_message.emit(f"警告: 无法解析切割点格式: {point}")
-            
-            # 更新进度
-            self.progress_update.emit(i + 1, f"已完成: {successful_clips}/{total_valid_points}")
-        
-        # 计算总耗时
-        end_time = time.time()
-        total_time = end_time - start_time
+                    self.log_message.emit(f"创建默认{name}目录失败: {e}")
         
-        success_message = f"\n===== 视频切割完成 =====\n"
-        success_message += f"成功处理片段数: {successful_clips}/{total_valid_points}\n"
-        success_message += f"总耗时: {format_duration(total_time)}\n"
-        success_message += f"输出目录: {self.output_dir}"
+        # 只扫描一次目录，同时查找MP4文件和切割点文件
+        video_path = ""
+        cut_points_path = ""
+        try:
+            names = os.listdir(self.video_dir)
+        except OSError:
+            names = []
+        mp4_files = [f for f in names if f.lower().endswith('.mp4')]
+        if mp4_files:
+            video_path = os.path.join(self.video_dir, mp4_files[0])
+        if os.path.basename(self.cut_points_file) in names:
+            cut_points_path = self.cut_points_file
+        else:
+            possible_cut_files = [f for f in names if '切割点' in f and f.endswith('.txt')]
+            if possible_cut_files:
+                cut_points_path = os.path.join(self.video_dir, possible_cut_files[0])
+        self.files_found.emit(video_path, cut_points_path)
         
-        self.log_message.emit(success_message)
-        self.process_finished.emit(True, success_message, self.output_dir, successful_clips, total_valid_points)
-    
-    def stop(self):
-        self.is_running = False
+        # 顺便预热FFmpeg能力缓存，开始处理时无需再等待探测
+        caps = get_ffmpeg_capabilities()
+        if caps is None:
+            self.log_message.emit("警告: 未找到FFmpeg。请确保FFmpeg已安装并添加到系统PATH中。")
+        else:
+            self.log_message.emit(f"已检测到FFmpeg: {caps['version']}")
 
 # 主窗口类
 class VideoSplitterApp(QMainWindow):
@@ -204,24 +131,13 @@ class VideoSplitterApp(QMainWindow):
         self.default_cut_points_file = os.path.join(self.default_video_dir, '视频切割点.txt')
         self.default_output_dir = os.path.join(self.default_video_dir, 'output')
         
-        # 确保默认目录存在
-        if not os.path.exists(self.default_video_dir):
-            try:
-                os.makedirs(self.default_video_dir)
-            except Exception as e:
-                print(f"创建默认视频目录失败: {e}")
-        
-        # 确保默认输出目录存在
-        if not os.path.exists(self.default_output_dir):
-            try:
-                os.makedirs(self.default_output_dir)
-            except Exception as e:
-                print(f"创建默认输出目录失败: {e}")
-        
         self.init_ui()
         self.process_thread = None
+        self.analysis_thread = None
+        self.discovery_thread = None
+        self.total_segments = 0
         
-        # 加载默认文件
+        # 在后台线程中加载默认文件，视频目录较大或位于网络磁盘时也不会阻塞窗口显示
         self.load_default_files()
     
     def init_ui(self):
@@ -291,7 +207,11 @@ class VideoSplitterApp(QMainWindow):
         video_select_btn.clicked.connect(self.select_video_file)
         video_layout.addWidget(QLabel("视频文件:"))
         video_layout.addWidget(self.video_path_label, 1)
+        video_url_btn = QPushButton("打开网络视频")
+        video_url_btn.setToolTip("输入HTTP(S)地址，处理时只下载各片段实际用到的部分")
+        video_url_btn.clicked.connect(self.open_video_url)
         video_layout.addWidget(video_select_btn)
+        video_layout.addWidget(video_url_btn)
         file_layout.addLayout(video_layout)
         
         # 切割点文件选择
@@ -300,9 +220,13 @@ class VideoSplitterApp(QMainWindow):
         self.cut_points_path_label.setStyleSheet("background-color: #f0f0f0; padding: 5px; border-radius: 3px;")
         cut_points_select_btn = QPushButton("选择切割点文件")
         cut_points_select_btn.clicked.connect(self.select_cut_points_file)
+        self.analyze_button = QPushButton("自动生成切割点")
+        self.analyze_button.setToolTip("分析视频中的静音和场景变化，生成候选切割点文件")
+        self.analyze_button.clicked.connect(self.generate_cut_points)
         cut_points_layout.addWidget(QLabel("切割点文件:"))
         cut_points_layout.addWidget(self.cut_points_path_label, 1)
         cut_points_layout.addWidget(cut_points_select_btn)
+        cut_points_layout.addWidget(self.analyze_button)
         file_layout.addLayout(cut_points_layout)
         
         # 输出目录选择
@@ -316,6 +240,18 @@ class VideoSplitterApp(QMainWindow):
         output_layout.addWidget(output_select_btn)
         file_layout.addLayout(output_layout)
         
+        # 暂存目录选择
+        scratch_layout = QHBoxLayout()
+        self.scratch_dir_label = QLabel(DEFAULT_SCRATCH_DIR)
+        self.scratch_dir_label.setStyleSheet("background-color: #f0f0f0; padding: 5px; border-radius: 3px;")
+        self.scratch_dir_label.setToolTip("片段先在本机暂存目录中编码，完成后再移动到输出目录")
+        scratch_select_btn = QPushButton("选择暂存目录")
+        scratch_select_btn.clicked.connect(self.select_scratch_dir)
+        scratch_layout.addWidget(QLabel("暂存目录:"))
+        scratch_layout.addWidget(self.scratch_dir_label, 1)
+        scratch_layout.addWidget(scratch_select_btn)
+        file_layout.addLayout(scratch_layout)
+        
         main_layout.addLayout(file_layout)
         
         # 选项区域
@@ -323,6 +259,33 @@ class VideoSplitterApp(QMainWindow):
         self.noise_reduction_checkbox = QCheckBox("应用音频降噪处理")
         self.noise_reduction_checkbox.setChecked(True)
         options_layout.addWidget(self.noise_reduction_checkbox)
+        self.proxy_checkbox = QCheckBox("同时生成预览代理")
+        self.proxy_checkbox.setToolTip("在同一次解码中额外输出低分辨率代理视频和封面帧到输出目录的proxy子目录")
+        options_layout.addWidget(self.proxy_checkbox)
+        self.sample_decode_checkbox = QCheckBox("抽样解码校验")
+        self.sample_decode_checkbox.setToolTip("校验片段时额外在几个位置各解码一帧，比只读取元数据稍慢")
+        options_layout.addWidget(self.sample_decode_checkbox)
+        self.subtitles_checkbox = QCheckBox("同时切割字幕")
+        self.subtitles_checkbox.setToolTip("使用与视频同名的SRT字幕文件，为每个片段输出时间从0开始的字幕切片")
+        options_layout.addWidget(self.subtitles_checkbox)
+        options_layout.addSpacing(20)
+        options_layout.addWidget(QLabel("编码配置:"))
+        self.profile_combo = QComboBox()
+        for name, profile in ENCODE_PROFILES.items():
+            self.profile_combo.addItem(profile['label'], name)
+        self.profile_combo.setCurrentIndex(self.profile_combo.findData(DEFAULT_PROFILE))
+        options_layout.addWidget(self.profile_combo)
+        options_layout.addSpacing(20)
+        options_layout.addWidget(QLabel("输出格式:"))
+        self.output_format_combo = QComboBox()
+        self.output_format_combo.addItem("MP4文件", None)
+        self.output_format_combo.addItem("HLS流媒体（多码率）", 'hls')
+        self.output_format_combo.addItem("DASH + HLS流媒体（多码率）", 'dash')
+        for name, audio_format in AUDIO_FORMATS.items():
+            self.output_format_combo.addItem(f"仅音频 {audio_format['label']}", name)
+        self.output_format_combo.setToolTip("流媒体格式在同一次编码中把每个片段打包为多码率的播放列表和分片，输出到以片段命名的子目录；\n"
+                                            "仅音频格式只提取每个片段的音频，不解码视频")
+        options_layout.addWidget(self.output_format_combo)
         options_layout.addStretch(1)
         main_layout.addLayout(options_layout)
         
@@ -398,6 +361,19 @@ class VideoSplitterApp(QMainWindow):
                 self.cut_points_path_label.setText(os.path.join(video_dir, possible_cut_files[0]))
                 self.log_message(f"已自动选择切割点文件: {possible_cut_files[0]}")
     
+    def open_video_url(self):
+        url, ok = QInputDialog.getText(self, "打开网络视频", "视频地址（HTTP或HTTPS，服务器需支持范围请求）:")
+        url = url.strip()
+        if not ok or not url:
+            return
+        if not is_url(url):
+            QMessageBox.warning(self, "警告", "请输入以 http:// 或 https:// 开头的地址")
+            return
+        self.video_path_label.setText(url)
+        # 网络视频没有所在目录，使用默认输出目录
+        if self.output_dir_label.text() == "未选择输出目录":
+            self.output_dir_label.setText(self.default_output_dir)
+    
     def select_cut_points_file(self):
         file_path, _ = QFileDialog.getOpenFileName(
             self, "选择切割点文件", self.default_video_dir if os.path.exists(self.default_video_dir) else "", 
@@ -406,41 +382,67 @@ class VideoSplitterApp(QMainWindow):
         if file_path:
             self.cut_points_path_label.setText(file_path)
     
+    def generate_cut_points(self):
+        video_path = self.video_path_label.text()
+        if not is_url(video_path) and not os.path.exists(video_path):
+            QMessageBox.warning(self, "警告", "请先选择视频文件")
+            return
+        
+        # 不覆盖手写的切割点文件；网络视频的切割点文件保存在默认视频目录中
+        video_dir = self.default_video_dir if is_url(video_path) else os.path.dirname(video_path)
+        output_path = os.path.join(video_dir, '视频切割点_自动.txt')
+        self.analysis_thread = CutAnalysisThread(video_path, output_path)
+        self.analysis_thread.log_message.connect(self.log_message)
+        self.analysis_thread.analysis_finished.connect(self.cut_points_generated)
+        self.analyze_button.setEnabled(False)
+        self.statusBar().showMessage("正在分析视频...")
+        self.analysis_thread.start()
+    
+    def cut_points_generated(self, success, result):
+        self.analyze_button.setEnabled(True)
+        if success:
+            self.cut_points_path_label.setText(result)
+            self.statusBar().showMessage("切割点已生成，请检查并修改片段名称后开始处理")
+        else:
+            self.statusBar().showMessage("自动生成切割点失败")
+    
     def select_output_dir(self):
         dir_path = QFileDialog.getExistingDirectory(self, "选择输出目录", 
                                                   self.default_output_dir if os.path.exists(self.default_output_dir) else "")
         if dir_path:
             self.output_dir_label.setText(dir_path)
     
+    def select_scratch_dir(self):
+        dir_path = QFileDialog.getExistingDirectory(self, "选择暂存目录", self.scratch_dir_label.text())
+        if dir_path:
+            self.scratch_dir_label.setText(dir_path)
+    
     def log_message(self, message):
         self.log_text.append(message)
         # 滚动到底部
         self.log_text.verticalScrollBar().setValue(self.log_text.verticalScrollBar().maximum())
     
     def load_default_files(self):
-        """加载默认文件和目录"""
-        # 检查默认视频目录是否存在
-        if os.path.exists(self.default_video_dir):
-            # 查找默认视频目录下的MP4文件
-            mp4_files = [f for f in os.listdir(self.default_video_dir) if f.lower().endswith('.mp4')]
-            if mp4_files:
-                default_video = os.path.join(self.default_video_dir, mp4_files[0])
-                self.video_path_label.setText(default_video)
-                self.log_message(f"已自动加载视频文件: {mp4_files[0]}")
-            
-            # 检查默认切割点文件是否存在
-            if os.path.exists(self.default_cut_points_file):
-                self.cut_points_path_label.setText(self.default_cut_points_file)
-                self.log_message(f"已自动加载切割点文件: 视频切割点.txt")
-            else:
-                # 查找其他可能的切割点文件
-                possible_cut_files = [f for f in os.listdir(self.default_video_dir) if '切割点' in f and f.endswith('.txt')]
-                if possible_cut_files:
-                    cut_file_path = os.path.join(self.default_video_dir, possible_cut_files[0])
-                    self.cut_points_path_label.setText(cut_file_path)
-                    self.log_message(f"已自动加载切割点文件: {possible_cut_files[0]}")
-            
-            # 设置默认输出目录
+        """在后台线程中查找默认文件和目录"""
+        self.discovery_thread = FileDiscoveryThread(
+            self.default_video_dir, self.default_cut_points_file, self.default_output_dir
+        )
+        self.discovery_thread.files_found.connect(self.default_files_found)
+        self.discovery_thread.log_message.connect(self.log_message)
+        self.discovery_thread.start()
+    
+    def default_files_found(self, video_path, cut_points_path):
+        """应用后台查找到的默认文件，用户已手动选择的不再覆盖"""
+        if video_path and self.video_path_label.text() == "未选择视频文件":
+            self.video_path_label.setText(video_path)
+            self.log_message(f"已自动加载视频文件: {os.path.basename(video_path)}")
+        
+        if cut_points_path and self.cut_points_path_label.text() == "未选择切割点文件":
+            self.cut_points_path_label.setText(cut_points_path)
+            self.log_message(f"已自动加载切割点文件: {os.path.basename(cut_points_path)}")
+        
+        # 设置默认输出目录
+        if self.output_dir_label.text() == "未选择输出目录":
             self.output_dir_label.setText(self.default_output_dir)
             self.log_message(f"已设置默认输出目录: {os.path.join('video', 'output')}")
     
@@ -451,7 +453,7 @@ class VideoSplitterApp(QMainWindow):
         output_dir = self.output_dir_label.text()
         
         # 如果未选择文件，尝试使用默认路径
-        if video_path == "未选择视频文件" or not os.path.exists(video_path):
+        if video_path == "未选择视频文件" or not is_url(video_path) and not os.path.exists(video_path):
             # 查找默认视频目录下的MP4文件
             if os.path.exists(self.default_video_dir):
                 mp4_files = [f for f in os.listdir(self.default_video_dir) if f.lower().endswith('.mp4')]
@@ -473,7 +475,7 @@ class VideoSplitterApp(QMainWindow):
                 self.cut_points_path_label.setText(cut_points_path)
             else:
                 # 查找其他可能的切割点文件
-                video_dir = os.path.dirname(video_path)
+                video_dir = self.default_video_dir if is_url(video_path) else os.path.dirname(video_path)
                 possible_cut_files = [f for f in os.listdir(video_dir) if '切割点' in f and f.endswith('.txt')]
                 if possible_cut_files:
                     cut_points_path = os.path.join(video_dir, possible_cut_files[0])
@@ -484,7 +486,10 @@ class VideoSplitterApp(QMainWindow):
         
         # 如果未选择输出目录，使用默认输出目录
         if output_dir == "未选择输出目录" or not os.path.exists(output_dir):
-            output_dir = os.path.join(os.path.dirname(video_path), 'output')
+            if is_url(video_path):
+                output_dir = self.default_output_dir
+            else:
+                output_dir = os.path.join(os.path.dirname(video_path), 'output')
             self.output_dir_label.setText(output_dir)
             # 确保输出目录存在
             if not os.path.exists(output_dir):
@@ -492,13 +497,27 @@ class VideoSplitterApp(QMainWindow):
         
         # 获取降噪选项
         noise_reduction = self.noise_reduction_checkbox.isChecked()
+        profile = self.profile_combo.currentData()
+        proxy = self.proxy_checkbox.isChecked()
+        scratch_dir = self.scratch_dir_label.text()
+        sample_decode = self.sample_decode_checkbox.isChecked()
+        output_format = self.output_format_combo.currentData()
+        audio_format = output_format if output_format in AUDIO_FORMATS else None
+        stream_format = None if audio_format else output_format
+        subtitles_path = None
+        if self.subtitles_checkbox.isChecked():
+            subtitles_path = find_sidecar_subtitle(video_path)
+            if subtitles_path is None:
+                self.log_message("未找到与视频同名的SRT字幕文件，不切割字幕")
         
         # 创建并启动处理线程
         self.process_thread = VideoProcessThread(
-            video_path, cut_points_path, output_dir, noise_reduction
+            video_path, cut_points_path, output_dir, noise_reduction, profile, proxy, scratch_dir, sample_decode,
+            stream_format, audio_format, subtitles_path
         )
         
         # 连接信号
+        self.process_thread.segments_planned.connect(self.set_total_segments)
         self.process_thread.progress_update.connect(self.update_progress)
         self.process_thread.process_finished.connect(self.process_finished)
         self.process_thread.log_message.connect(self.log_message)
@@ -508,6 +527,7 @@ class VideoSplitterApp(QMainWindow):
         self.cancel_button.setEnabled(True)
         self.open_output_button.setEnabled(False)
         self.progress_bar.setValue(0)
+        self.total_segments = 0
         self.progress_status.setText("正在处理...")
         self.statusBar().showMessage("处理中...")
         
@@ -527,23 +547,21 @@ class VideoSplitterApp(QMainWindow):
                 self.process_thread.stop()
                 self.cancel_button.setEnabled(False)
     
+    def set_total_segments(self, total):
+        self.total_segments = total
+    
     def update_progress(self, current, status):
-        # 读取切割点文件以获取总数
-        try:
-            cut_points_path = self.cut_points_path_label.text()
-            if os.path.exists(cut_points_path):
-                with open(cut_points_path, 'r', encoding='utf-8') as f:
-                    total_points = len([line for line in f.readlines() if line.strip()])
-                if total_points > 0:
-                    progress = int((current / total_points) * 100)
-                    self.progress_bar.setValue(min(progress, 100))
-        except Exception:
-            # 如果无法读取文件，使用相对进度
+        # 按处理线程解析出的片段总数计算进度
+        if self.total_segments > 0:
+            progress = int((current / self.total_segments) * 100)
+            self.progress_bar.setValue(min(progress, 100))
+        else:
+            # 尚未得到总数时使用相对进度
             self.progress_bar.setValue(min(current, 100))
         
         self.progress_status.setText(status)
     
-    def process_finished(self, success, message, output_dir, successful_clips, total_clips):
+    def process_finished(self, success, message, output_dir, successful_clips, total_clips, failed_verification=0):
         # 更新UI状态
         self.start_button.setEnabled(True)
         self.cancel_button.setEnabled(False)
@@ -554,11 +572,16 @@ class VideoSplitterApp(QMainWindow):
             self.progress_status.setText(f"完成: {successful_clips}/{total_clips}")
             self.statusBar().showMessage("处理完成")
             
-            # 显示完成消息
-            QMessageBox.information(self, "处理完成", 
-                                  f"视频切割已完成！\n\n"
-                                  f"成功处理片段数: {successful_clips}/{total_clips}\n"
-                                  f"输出目录: {output_dir}")
+            # 显示完成消息，有片段校验未通过时提示查看日志
+            summary = (f"视频切割已完成！\n\n"
+                       f"成功处理片段数: {successful_clips}/{total_clips}\n")
+            if failed_verification:
+                summary += f"校验未通过片段数: {failed_verification}（未发布，详见处理日志）\n"
+            summary += f"输出目录: {output_dir}"
+            if failed_verification:
+                QMessageBox.warning(self, "处理完成", summary)
+            else:
+                QMessageBox.information(self, "处理完成", summary)
         else:
             self.progress_status.setText("处理失败")
             self.statusBar().showMessage("处理失败")